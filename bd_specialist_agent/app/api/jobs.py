@@ -0,0 +1,53 @@
+# app/api/jobs.py
+import logging
+from fastapi import APIRouter, Depends, Request
+from typing import Dict, Any
+
+from services.job_queue import JobQueue
+from services.idempotency_cache import IdempotencyCache
+from services.admission_control import AdmissionController
+from services.voice_coalescer import VoiceCoalescer
+from services.conversation_modes import ConversationModes
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
+
+def get_admission_controller(request: Request) -> AdmissionController:
+    return request.app.state.admission_controller
+
+def get_idempotency_cache(request: Request) -> IdempotencyCache:
+    return request.app.state.idempotency_cache
+
+def get_voice_coalescer(request: Request) -> VoiceCoalescer:
+    return request.app.state.voice_coalescer
+
+def get_conversation_modes(request: Request) -> ConversationModes:
+    return request.app.state.conversation_modes
+
+@router.get("/", response_model=Dict[str, Any])
+async def get_job_queue_stats(job_queue: JobQueue = Depends(get_job_queue)):
+    """Retorna profundidade da fila, número de workers e tempos dos jobs recentes."""
+    return job_queue.get_stats()
+
+@router.get("/admission", response_model=Dict[str, Any])
+async def get_admission_stats(admission_controller: AdmissionController = Depends(get_admission_controller)):
+    """Retorna pipelines em execução, fila de espera e mensagens recusadas por sobrecarga."""
+    return admission_controller.get_stats()
+
+@router.get("/idempotency", response_model=Dict[str, Any])
+async def get_idempotency_stats(idempotency_cache: IdempotencyCache = Depends(get_idempotency_cache)):
+    """Retorna ocupação e contadores de hit/miss do índice de mensagens duplicadas."""
+    return idempotency_cache.get_stats()
+
+@router.get("/coalescer", response_model=Dict[str, Any])
+async def get_coalescer_stats(voice_coalescer: VoiceCoalescer = Depends(get_voice_coalescer)):
+    """Retorna a janela de agrupamento, lotes em aberto e notas de voz agrupadas."""
+    return voice_coalescer.get_stats()
+
+@router.get("/reply-modality", response_model=Dict[str, Any])
+async def get_reply_modality_stats(conversation_modes: ConversationModes = Depends(get_conversation_modes)):
+    """Retorna a política de modalidade de resposta e quantas respostas saíram em texto e em áudio."""
+    return conversation_modes.get_stats()
@@ -0,0 +1,12 @@
+# app/api/metrics.py
+import logging
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("")
+async def get_metrics():
+    """Exporta as métricas no formato texto do Prometheus."""
+    return Response(content=generate_latest(), headers={"Content-Type": CONTENT_TYPE_LATEST})
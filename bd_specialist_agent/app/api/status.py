@@ -6,6 +6,12 @@ from typing import List, Dict, Any
 from services.stt_service import STTService
 from services.tts_service import TTSService
 from services.evolution_service import EvolutionService
+from services.evolution_outbox import get_outbox_stats
+from services.resilience import get_resilience_stats
+from services.instance_router import instance_router
+from services.http_client import http_pool
+from services.transcription_cache import transcription_cache
+from services.speech_cache import speech_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -24,7 +30,36 @@ async def get_services_status():
         is_healthy = await service_info["service"].health_check()
         status_list.append({
             "name": service_info["name"],
-            "status": "Online" if is_healthy else "Offline"
+            "status": "Online" if is_healthy else "Offline",
+            "circuit": service_info["service"].circuit_state
         })
         
     return status_list
+
+@router.get("/http-pool", response_model=Dict[str, Any])
+async def get_http_pool_stats():
+    """Retorna limites e contadores de uso das sessões HTTP compartilhadas."""
+    return http_pool.get_stats()
+
+@router.get("/caches", response_model=Dict[str, Any])
+async def get_cache_stats():
+    """Retorna taxa de acerto e ocupação dos caches de áudio."""
+    return {
+        "stt": transcription_cache.get_stats(),
+        "tts": speech_cache.get_stats(),
+    }
+
+@router.get("/outbox", response_model=Dict[str, Any])
+async def get_evolution_outbox_stats():
+    """Retorna rate limit e contadores de envios entregues, repetidos e descartados por instância da Evolution API."""
+    return get_outbox_stats()
+
+@router.get("/resilience", response_model=Dict[str, Any])
+async def get_resilience_status():
+    """Retorna o estado dos circuit breakers e os contadores de requisições hedged por serviço externo."""
+    return get_resilience_stats()
+
+@router.get("/instances", response_model=Dict[str, Any])
+async def get_evolution_instances_status():
+    """Retorna as instâncias da Evolution API: disponibilidade, circuito, outbox e conversas atendidas por cada uma."""
+    return instance_router.get_stats()
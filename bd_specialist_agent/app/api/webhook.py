@@ -1,18 +1,33 @@
 # app/api/webhook.py
 import os
+import time
+import uuid
+import inspect
+import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import BinaryIO, Dict, Any, List, Optional
 
 from fastapi import APIRouter, Request, HTTPException, Depends
 from fastapi.responses import JSONResponse
 
+from app.config import settings
 from models.webhook_models import WebhookData, MessageData
 from services.evolution_service import EvolutionService
 from services.audio_processor import AudioProcessor
 from services.stt_service import STTService
 from services.tts_service import TTSService
-from utils.helpers import extract_phone_number, is_audio_message
+from services.voice_encoder import VoiceEncoder
+from services.speech_streamer import SpeechReplyStreamer
+from services.conversation_modes import AUDIO, TEXT
+from utils.audio_buffer import decode_base64_buffer, hash_buffer, iter_bytes
+from utils.audio_headers import AUDIO_CONTENT_TYPES, sniff_format
+from utils.exceptions import AudioProcessingError, InvalidAudioError, JobQueueFullError, SilentAudioError
+from utils.helpers import (
+    extract_inline_media, extract_message_id, extract_message_text, extract_phone_number, is_audio_message,
+    is_from_me, is_individual_chat
+)
+from utils.metrics import TIME_TO_FIRST_AUDIO_SECONDS, VOICE_NOTE_SOURCES, track_stage
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -21,6 +36,14 @@ evolution_service = EvolutionService()
 audio_processor = AudioProcessor()
 stt_service = STTService()
 tts_service = TTSService()
+voice_encoder = VoiceEncoder()
+speech_streamer = SpeechReplyStreamer(tts_service, evolution_service, voice_encoder)
+
+# Journaled as the failure of a job cancelled by JOB_TIMEOUT_SECONDS (never resumed)
+JOB_TIMEOUT_ERROR = f"Job cancelado após {settings.JOB_TIMEOUT_SECONDS}s"
+
+# Fire-and-forget tasks (e.g. busy notices) kept referenced until they finish
+_background_tasks = set()
 
 @router.post("/evolution")
 async def handle_evolution_webhook(request: Request):
@@ -30,56 +53,392 @@ async def handle_evolution_webhook(request: Request):
         webhook_data = await request.json()
         logger.info(f"📨 Webhook recebido: {webhook_data.get('event', 'unknown')}")
         
+        # Messages sent from our own number (operator or the bot's replies) are never answered
+        if is_from_me(webhook_data):
+            return JSONResponse({"status": "ignored", "reason": "from_me"})
+        
+        # Groups, status posts and channels have no customer phone number to answer
+        if not is_individual_chat(webhook_data):
+            return JSONResponse({"status": "ignored", "reason": "not_individual_chat"})
+        
+        # Drop redeliveries of a message we already accepted
+        app_state = request.app.state
+        message_id = extract_message_id(webhook_data)
+        if message_id and app_state.idempotency_cache.check_and_mark(message_id):
+            logger.info(f"🔁 Mensagem duplicada ignorada: {message_id}")
+            return JSONResponse({"status": "ignored", "reason": "duplicate_message"})
+        
         # Validate webhook structure
         #if not _is_valid_webhook(webhook_data):
         #    logger.warning("⚠️ Webhook inválido recebido")
         #    return JSONResponse({"status": "ignored", "reason": "invalid_webhook"})
         
-        # Handle only audio messages
+        # Typed messages skip STT/TTS entirely
+        message_text = extract_message_text(webhook_data)
+        if message_text is not None:
+            return _enqueue_text_message(webhook_data, message_text, app_state, message_id)
+        
+        # Otherwise handle only audio messages
         if not is_audio_message(webhook_data):
-            logger.info("ℹ️ Mensagem não é de áudio, ignorando")
-            return JSONResponse({"status": "ignored", "reason": "not_audio_message"})
+            logger.info("ℹ️ Mensagem não é de texto nem de áudio, ignorando")
+            return JSONResponse({"status": "ignored", "reason": "unsupported_message"})
         
         # Extract message data
         message_data = webhook_data #_extract_message_data(webhook_data)
         phone_number = extract_phone_number(message_data["key"]["remoteJid"])
+        app_state.conversation_modes.record_inbound(phone_number, AUDIO)
+        
+        # Coalescing window: a voice note joins the customer's open batch (already admitted)
+        coalescer = app_state.voice_coalescer
+        if coalescer.enabled and coalescer.has_batch(phone_number):
+            coalescer.add(phone_number, message_data)
+            logger.info(f"🧺 Áudio de {phone_number} agrupado ao lote em aberto")
+            return JSONResponse({"status": "coalesced", "timestamp": datetime.utcnow().isoformat()}, status_code=202)
         
-        logger.info(f"🎵 Processando áudio do cliente: {phone_number}")
+        # Admission control: over capacity, answer with a short notice instead of a pipeline
+        admission = app_state.admission_controller
+        if not admission.try_admit():
+            logger.warning(f"🚦 Sistema acima da capacidade, recusando áudio de {phone_number}")
+            _notify_busy(app_state, phone_number)
+            return JSONResponse({"status": "shed", "reason": "over_capacity"})
         
-        # Process the audio message
-        await _process_audio_message(message_data, phone_number, request.app.state)
+        if coalescer.enabled:
+            coalescer.add(phone_number, message_data)
+            logger.info(f"🧺 Lote de áudio aberto para {phone_number} ({coalescer.window}s)")
+            return JSONResponse({"status": "queued", "timestamp": datetime.utcnow().isoformat()}, status_code=202)
         
-        return JSONResponse({"status": "processed", "timestamp": datetime.utcnow().isoformat()})
+        logger.info(f"🎵 Enfileirando áudio do cliente: {phone_number}")
+        
+        # Queue the audio message in the customer's lane and answer right away
+        try:
+            job_id = _submit_audio_job(app_state, phone_number, [message_data])
+        except JobQueueFullError as e:
+            logger.warning(f"⚠️ {str(e)}, webhook recusado")
+            # Let Evolution's retry of this message through
+            if message_id:
+                app_state.idempotency_cache.forget(message_id)
+            return JSONResponse({"status": "rejected", "reason": "queue_full"}, status_code=503)
+        
+        return JSONResponse(
+            {"status": "queued", "job_id": job_id, "timestamp": datetime.utcnow().isoformat()},
+            status_code=202
+        )
         
     except Exception as e:
         logger.error(f"❌ Erro no webhook: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Webhook processing error: {str(e)}")
 
-async def _process_audio_message(message_data: Dict[str, Any], phone_number: str, app_state):
-    """Processa uma mensagem de áudio completa"""
-    temp_files = []
+def _enqueue_text_message(webhook_data: Dict[str, Any], message_text: str, app_state, message_id: Optional[str]) -> JSONResponse:
+    """Enfileira uma mensagem de texto na lane do cliente (sem admissão: não usa STT/TTS)"""
+    key = webhook_data.get("data", {}).get("key") or webhook_data.get("key") or {}
+    phone_number = extract_phone_number(key["remoteJid"])
+    
+    # Voice notes sent before this text go ahead of it in the lane, keeping their audio reply
+    app_state.voice_coalescer.flush(phone_number)
+    
+    app_state.conversation_modes.record_inbound(phone_number, TEXT)
+    reply_modality = app_state.conversation_modes.reply_modality(phone_number, default=TEXT)
+    
+    logger.info(f"💬 Enfileirando mensagem de texto do cliente: {phone_number}")
+    
+    try:
+        job_id = app_state.job_queue.submit(
+            "text_message",
+            lambda: _process_text_message(message_text, phone_number, app_state, reply_modality),
+            lane_key=phone_number,
+            on_timeout=lambda: _spawn(_send_error_reply(phone_number, TEXT))
+        )
+    except JobQueueFullError as e:
+        logger.warning(f"⚠️ {str(e)}, webhook recusado")
+        # Let Evolution's retry of this message through
+        if message_id:
+            app_state.idempotency_cache.forget(message_id)
+        return JSONResponse({"status": "rejected", "reason": "queue_full"}, status_code=503)
+    
+    return JSONResponse(
+        {"status": "queued", "job_id": job_id, "timestamp": datetime.utcnow().isoformat()},
+        status_code=202
+    )
+
+async def _process_text_message(message_text: str, phone_number: str, app_state, reply_modality: str):
+    """Processa uma mensagem de texto: agente -> resposta na modalidade da conversa"""
+    started_at = time.perf_counter()
+    with track_stage("total_text"):
+        try:
+            logger.info("🤖 Consultando agente especialista...")
+            conversation_context = {
+                "customer_phone": phone_number,
+                "current_timestamp": datetime.utcnow().isoformat(),
+                "message_type": "text"
+            }
+            
+            specialist_agent = app_state.specialist_agent
+            
+            if reply_modality == AUDIO and _agent_streams(specialist_agent):
+                agent_response = await _stream_agent_reply(
+                    phone_number, specialist_agent, message_text, conversation_context, started_at
+                )
+            else:
+                with track_stage("agent"):
+                    agent_response = await _query_agent(specialist_agent, message_text, conversation_context)
+                await _send_agent_reply(phone_number, agent_response, reply_modality, started_at)
+            logger.info(f"🧠 Resposta do agente: {agent_response[:100]}...")
+            logger.info("✅ Processamento da mensagem de texto finalizado")
+            
+        except Exception as e:
+            logger.error(f"❌ Erro no processamento da mensagem de texto: {str(e)}")
+            try:
+                await evolution_service.send_text_message(phone_number, settings.ERROR_REPLY_TEXT)
+            except:
+                logger.error("❌ Falha ao enviar mensagem de erro para o cliente")
+
+def _agent_streams(specialist_agent) -> bool:
+    """Indica se o agente entrega a resposta em pedaços (process_query como async generator)"""
+    return settings.TTS_AGENT_STREAMING and inspect.isasyncgenfunction(
+        getattr(specialist_agent, "process_query", None)
+    )
+
+async def _query_agent(specialist_agent, query: str, context: Dict[str, Any]) -> str:
+    """Consulta o agente e devolve a resposta completa, juntando o stream se o agente fizer streaming"""
+    if inspect.isasyncgenfunction(specialist_agent.process_query):
+        return "".join([chunk async for chunk in specialist_agent.process_query(query=query, context=context)])
+    return await specialist_agent.process_query(query=query, context=context)
+
+async def _stream_agent_reply(
+    phone_number: str,
+    specialist_agent,
+    query: str,
+    context: Dict[str, Any],
+    started_at: float
+) -> str:
+    """Consulta o agente em streaming e envia cada frase em voz assim que fica pronta"""
+    logger.info("🤖🔊 Consultando agente com resposta em voz frase a frase...")
+    with track_stage("agent_tts_send"):
+        return await speech_streamer.deliver(
+            phone_number,
+            specialist_agent.process_query(query=query, context=context),
+            started_at
+        )
+
+async def _send_agent_reply(
+    phone_number: str,
+    agent_response: str,
+    reply_modality: str,
+    started_at: Optional[float] = None
+):
+    """Envia a resposta do agente como texto ou como áudio (TTS sem arquivo; em Opus, codificado em memória antes do envio)"""
+    if reply_modality == TEXT:
+        logger.info("📤 Enviando resposta em texto...")
+        with track_stage("send_text"):
+            await evolution_service.send_text_message(phone_number, agent_response)
+        return
+    
+    logger.info("🔊📤 Gerando e enviando resposta em áudio (streaming)...")
+    with track_stage("tts_send"):
+        voice_note, content_type = await voice_encoder.encode_stream(tts_service.stream_speech(agent_response))
+        output_filename = voice_encoder.filename(
+            f"response_{phone_number}_{int(datetime.utcnow().timestamp())}", content_type
+        )
+        await evolution_service.send_audio_stream(
+            phone_number,
+            voice_note,
+            filename=output_filename,
+            content_type=content_type
+        )
+    if started_at is not None:
+        TIME_TO_FIRST_AUDIO_SECONDS.labels(mode="full").observe(time.perf_counter() - started_at)
+
+def _submit_audio_job(app_state, phone_number: str, messages: List[Dict[str, Any]]) -> str:
+    """Registra no journal e enfileira um job de áudio (uma ou mais notas) na lane do cliente"""
+    job_key = extract_message_id(messages[0]) or uuid.uuid4().hex
+    
+    # Journal the accepted job so it can be resumed after a restart
+    app_state.job_journal.begin(job_key, phone_number, messages)
+    reply_modality = app_state.conversation_modes.reply_modality(phone_number)
+    
+    try:
+        return app_state.job_queue.submit(
+            "audio_message",
+            lambda: _process_audio_message(messages, phone_number, app_state, job_key, reply_modality),
+            lane_key=phone_number,
+            on_timeout=lambda: _on_audio_job_timeout(app_state, job_key, phone_number),
+            media_source=_media_source(messages)
+        )
+    except JobQueueFullError as e:
+        app_state.admission_controller.cancel()
+        app_state.job_journal.fail(job_key, str(e))
+        raise
+
+def _on_audio_job_timeout(app_state, job_key: str, phone_number: str):
+    """Job de áudio cancelado por JOB_TIMEOUT_SECONDS: falha no journal e mensagem de erro ao cliente"""
+    app_state.job_journal.fail(job_key, JOB_TIMEOUT_ERROR)
+    _spawn(_send_error_reply(phone_number, AUDIO))
+
+def submit_voice_batch(app_state, phone_number: str, messages: List[Dict[str, Any]]):
+    """Callback da janela de agrupamento: enfileira o lote de notas de voz como um único job"""
+    try:
+        _submit_audio_job(app_state, phone_number, messages)
+    except JobQueueFullError as e:
+        logger.warning(f"⚠️ {str(e)}, lote de áudio de {phone_number} descartado")
+        _notify_busy(app_state, phone_number)
+
+async def _process_audio_message(
+    messages: List[Dict[str, Any]],
+    phone_number: str,
+    app_state,
+    job_key: Optional[str] = None,
+    reply_modality: Optional[str] = None
+):
+    """Processa uma mensagem de áudio completa (uma ou mais notas de voz agrupadas)"""
+    async with app_state.admission_controller.slot():
+        with track_stage("total"):
+            await _run_audio_pipeline(messages, phone_number, app_state, job_key, reply_modality)
+
+def _media_source(messages: List[Dict[str, Any]]) -> str:
+    """Origem prevista do áudio de um job: inline (base64 no webhook), download ou mixed"""
+    sources = {"inline" if extract_inline_media(message_data) else "download" for message_data in messages}
+    return sources.pop() if len(sources) == 1 else "mixed"
+
+def _decode_inline_audio(message_data: Dict[str, Any]) -> Optional[BinaryIO]:
+    """Decodifica a nota de voz enviada em base64 no webhook; None se ausente ou inválida"""
+    inline_media = extract_inline_media(message_data)
+    if not inline_media:
+        return None
     
     try:
-        # 1. Download do áudio
+        with track_stage("decode"):
+            return decode_base64_buffer(
+                inline_media, settings.AUDIO_SPOOL_MAX_BYTES, settings.MAX_AUDIO_SIZE_MB * 1024 * 1024
+            )
+    except ValueError as e:
+        logger.warning(f"⚠️ Mídia inline inválida, baixando pelo mediaUrl: {str(e)}")
+        return None
+
+async def _transcribe_voice_note(message_data: Dict[str, Any], phone_number: str) -> str:
+    """Obtém (inline ou por download) e transcreve uma nota de voz"""
+    # 1. Áudio inline no webhook ou download pelo mediaUrl
+    audio_buffer = _decode_inline_audio(message_data)
+    
+    if audio_buffer is not None:
+        source = "inline"
+        logger.info("📎 Usando áudio inline do webhook (sem download)")
+    else:
+        source = "download"
         logger.info("⬇️ Baixando áudio...")
         audio_url = message_data.get("mediaUrl") or message_data.get("url")
         if not audio_url:
             raise ValueError("URL do áudio não encontrada na mensagem")
-            
-        audio_input_path = await evolution_service.download_audio(audio_url, phone_number)
-        temp_files.append(audio_input_path)
+        
+        with track_stage("download"):
+            audio_buffer = await evolution_service.download_audio_buffer(audio_url, phone_number)
+    
+    VOICE_NOTE_SOURCES.labels(source=source).inc()
+    
+    try:
+        # Reject payloads that are not audio before spending STT on them
+        if not audio_processor.validate_audio_buffer(audio_buffer, settings.MAX_AUDIO_SIZE_MB):
+            raise InvalidAudioError(f"Conteúdo ({source}) não é um áudio suportado")
+        
+        audio_format = sniff_format(audio_buffer)
+        filename, content_type = f"audio.{audio_format}", AUDIO_CONTENT_TYPES[audio_format]
+        
+        # A repeated note is answered from the STT cache, keyed on the received bytes, before any VAD/decoding
+        audio_digest = hash_buffer(audio_buffer)
+        cached_text = stt_service.get_cached_transcription(audio_digest)
+        if cached_text is not None:
+            logger.info("♻️ Transcrição em cache para esta nota de voz, pulando VAD e STT")
+            return cached_text
+        
+        # Trim leading/trailing silence so STT only pays for speech
+        if settings.VAD_ENABLED:
+            try:
+                with track_stage("vad"):
+                    trimmed_buffer, _ = await audio_processor.trim_silence(audio_buffer)
+            except SilentAudioError:
+                raise
+            except AudioProcessingError as e:
+                logger.warning(f"⚠️ VAD indisponível, transcrevendo áudio completo: {str(e)}")
+            else:
+                audio_buffer.close()
+                audio_buffer = trimmed_buffer
+                filename, content_type = "audio.wav", "audio/wav"
         
         # 2. Transcrição (STT)
         logger.info("🎤 Transcrevendo áudio...")
-        transcribed_text = await stt_service.transcribe_audio(audio_input_path)
-        logger.info(f"📝 Texto transcrito: {transcribed_text[:100]}...")
+        with track_stage("stt"):
+            return await stt_service.transcribe_buffer(audio_buffer, filename, content_type, audio_digest)
+    finally:
+        audio_buffer.close()
+
+async def _transcribe_voice_notes(messages: List[Dict[str, Any]], phone_number: str) -> str:
+    """Transcreve as notas de voz em paralelo e junta os textos na ordem de chegada"""
+    results = await asyncio.gather(
+        *(_transcribe_voice_note(message_data, phone_number) for message_data in messages),
+        return_exceptions=True
+    )
+    
+    texts = [result.strip() for result in results if isinstance(result, str) and result.strip()]
+    errors = [result for result in results if isinstance(result, Exception)]
+    
+    # Silent or invalid notes are dropped from a batch; only an all-rejected batch gets a canned reply
+    rejected = [error for error in errors if isinstance(error, (SilentAudioError, InvalidAudioError))]
+    if rejected and len(rejected) == len(results):
+        raise rejected[0]
+    errors = [error for error in errors if error not in rejected]
+    
+    # A failed note only aborts the batch when no other note produced text
+    if errors and not texts:
+        raise errors[0]
+    for error in errors:
+        logger.warning(f"⚠️ Nota de voz ignorada no lote: {str(error)}")
+    
+    return " ".join(texts)
+
+async def _run_audio_pipeline(
+    messages: List[Dict[str, Any]],
+    phone_number: str,
+    app_state,
+    job_key: Optional[str] = None,
+    reply_modality: Optional[str] = None
+):
+    """Executa as etapas download -> STT -> agente -> TTS -> envio de uma mensagem de áudio.
+
+    Notas agrupadas são transcritas em paralelo e respondidas com uma única
+    consulta ao agente. Cada etapa concluída é gravada no journal; um job
+    retomado após restart pula as etapas que já têm resultado registrado.
+    """
+    started_at = time.perf_counter()
+    temp_files = []
+    journal = app_state.job_journal
+    checkpoint = (journal.get(job_key) if job_key else None) or {}
+    
+    try:
+        transcribed_text = checkpoint.get("transcript")
         
-        if not transcribed_text or transcribed_text.strip() == "":
-            await evolution_service.send_text_message(
-                phone_number, 
-                "Desculpe, não consegui entender o áudio. Poderia repetir ou enviar uma mensagem de texto?"
-            )
-            return
+        if transcribed_text:
+            logger.info("♻️ Retomando job do journal: transcrição já registrada")
+        else:
+            # 1. Download e 2. Transcrição (STT) das notas de voz
+            try:
+                transcribed_text = await _transcribe_voice_notes(messages, phone_number)
+            except SilentAudioError as e:
+                logger.info(f"🔇 {str(e)}, respondendo sem consultar o STT")
+                await _send_fixed_reply(phone_number, settings.SILENT_AUDIO_REPLY_TEXT)
+                journal.complete(job_key)
+                return
+            except InvalidAudioError as e:
+                logger.warning(f"⚠️ {str(e)}, respondendo sem consultar o STT")
+                await _send_fixed_reply(phone_number, settings.NOT_UNDERSTOOD_REPLY_TEXT)
+                journal.complete(job_key)
+                return
+            logger.info(f"📝 Texto transcrito: {transcribed_text[:100]}...")
+            
+            if not transcribed_text or transcribed_text.strip() == "":
+                await _send_fixed_reply(phone_number, settings.NOT_UNDERSTOOD_REPLY_TEXT)
+                journal.complete(job_key)
+                return
+            
+            journal.checkpoint(job_key, "stt", transcript=transcribed_text)
         
         # 3. Processamento pelo Agente Especialista
         logger.info("🤖 Consultando agente especialista...")
@@ -90,41 +449,76 @@ async def _process_audio_message(message_data: Dict[str, Any], phone_number: str
             "customer_phone": phone_number,
             "current_timestamp": datetime.utcnow().isoformat(),
             "message_type": "audio",
+            "voice_notes": len(messages),
             "transcribed_text": transcribed_text
         }
         
-        agent_response = await specialist_agent.process_query(
-            query=transcribed_text,
-            context=conversation_context
-        )
+        agent_response = checkpoint.get("agent_response")
+        # Jobs resumed from the journal did not capture a modality when accepted
+        reply_modality = reply_modality or app_state.conversation_modes.reply_modality(phone_number)
         
-        logger.info(f"🧠 Resposta do agente: {agent_response[:100]}...")
+        if not agent_response and reply_modality == AUDIO and _agent_streams(specialist_agent):
+            # 3-5. Agente em streaming: cada frase é sintetizada e enviada enquanto o agente escreve
+            agent_response = await _stream_agent_reply(
+                phone_number, specialist_agent, transcribed_text, conversation_context, started_at
+            )
+            journal.checkpoint(job_key, "agent", agent_response=agent_response)
+            journal.complete(job_key)
+            logger.info(f"🧠 Resposta do agente: {agent_response[:100]}...")
+            logger.info("✅ Processamento completo do áudio finalizado")
+            return
         
-        # 4. Síntese de voz (TTS)
-        logger.info("🔊 Gerando resposta em áudio...")
-        audio_output_path = await tts_service.synthesize_speech(
-            text=agent_response,
-            output_filename=f"response_{phone_number}_{int(datetime.utcnow().timestamp())}.wav"
-        )
-        temp_files.append(audio_output_path)
+        if agent_response:
+            logger.info("♻️ Retomando job do journal: resposta do agente já registrada")
+        else:
+            with track_stage("agent"):
+                agent_response = await _query_agent(specialist_agent, transcribed_text, conversation_context)
+            journal.checkpoint(job_key, "agent", agent_response=agent_response)
         
-        # 5. Envio da resposta
-        logger.info("📤 Enviando resposta em áudio...")
-        await evolution_service.send_audio_message(phone_number, audio_output_path)
+        logger.info(f"🧠 Resposta do agente: {agent_response[:100]}...")
         
+        # 4. Síntese de voz (TTS) e 5. Envio da resposta (ou texto, se a conversa preferir)
+        if settings.TTS_STREAMING_UPLOAD or reply_modality == TEXT:
+            await _send_agent_reply(phone_number, agent_response, reply_modality, started_at)
+        else:
+            output_filename = f"response_{phone_number}_{int(datetime.utcnow().timestamp())}.wav"
+            
+            audio_output_path = checkpoint.get("tts_artifact")
+            
+            if audio_output_path and os.path.exists(audio_output_path):
+                logger.info("♻️ Retomando job do journal: áudio TTS já gerado")
+            else:
+                logger.info("🔊 Gerando resposta em áudio...")
+                with track_stage("tts"):
+                    audio_output_path = await tts_service.synthesize_speech(
+                        text=agent_response,
+                        output_filename=output_filename
+                    )
+                journal.checkpoint(job_key, "tts", tts_artifact=audio_output_path)
+            temp_files.append(audio_output_path)
+            
+            with track_stage("encode"):
+                voice_note_path, content_type = await voice_encoder.encode_file(audio_output_path)
+            if voice_note_path != audio_output_path:
+                temp_files.append(voice_note_path)
+            
+            logger.info("📤 Enviando resposta em áudio...")
+            with track_stage("send"):
+                await evolution_service.send_audio_message(
+                    phone_number, voice_note_path, content_type=content_type
+                )
+            TIME_TO_FIRST_AUDIO_SECONDS.labels(mode="full").observe(time.perf_counter() - started_at)
+        
+        journal.complete(job_key)
         logger.info("✅ Processamento completo do áudio finalizado")
         
     except Exception as e:
         logger.error(f"❌ Erro no processamento do áudio: {str(e)}")
+        journal.fail(job_key, str(e))
         
         # Enviar mensagem de erro para o cliente
-        error_message = (
-            "Desculpe, ocorreu um erro ao processar sua consulta. "
-            "Tente novamente em alguns instantes ou entre em contato com o suporte."
-        )
-        
         try:
-            await evolution_service.send_text_message(phone_number, error_message)
+            await _send_fixed_reply(phone_number, settings.ERROR_REPLY_TEXT)
         except:
             logger.error("❌ Falha ao enviar mensagem de erro para o cliente")
             
@@ -137,3 +531,80 @@ async def _process_audio_message(message_data: Dict[str, Any], phone_number: str
                     logger.debug(f"Arquivo temporário removido: {temp_file}")
             except Exception as e:
                 logger.warning(f"⚠️ Falha ao remover arquivo temporário {temp_file}: {e}")
+
+def resume_journaled_jobs(app_state) -> int:
+    """Reenfileira os jobs interrompidos pelo último encerramento, a partir da última etapa concluída"""
+    resumed = 0
+    
+    for job in app_state.job_journal.pending_jobs():
+        # Rows journaled before voice-note batching hold a single message
+        if isinstance(job["message_data"], dict):
+            job["message_data"] = [job["message_data"]]
+        
+        app_state.admission_controller.try_admit(force=True)
+        try:
+            app_state.job_queue.submit(
+                "audio_message",
+                lambda job=job: _process_audio_message(
+                    job["message_data"], job["phone_number"], app_state, job["job_key"]
+                ),
+                lane_key=job["phone_number"],
+                on_timeout=lambda job=job: _on_audio_job_timeout(app_state, job["job_key"], job["phone_number"]),
+                media_source=_media_source(job["message_data"])
+            )
+        except JobQueueFullError as e:
+            app_state.admission_controller.cancel()
+            logger.warning(f"⚠️ {str(e)}, retomada de jobs interrompida")
+            break
+        resumed += 1
+    
+    if resumed:
+        logger.info(f"♻️ {resumed} jobs retomados do journal")
+    return resumed
+
+async def _send_fixed_reply(phone_number: str, text: str):
+    """Envia uma resposta fixa em áudio se já estiver no cache TTS, senão como texto"""
+    cached_audio = tts_service.get_cached_speech(text)
+    
+    if cached_audio is not None:
+        voice_note, content_type = await voice_encoder.encode_bytes(cached_audio)
+        await evolution_service.send_audio_stream(
+            phone_number,
+            iter_bytes(voice_note),
+            filename=voice_encoder.filename("response", content_type),
+            content_type=content_type
+        )
+    else:
+        await evolution_service.send_text_message(phone_number, text)
+
+async def _send_error_reply(phone_number: str, modality: str):
+    """Envia a mensagem de erro de um job que não terminou (em áudio do cache, se a conversa é por voz)"""
+    try:
+        if modality == AUDIO:
+            await _send_fixed_reply(phone_number, settings.ERROR_REPLY_TEXT)
+        else:
+            await evolution_service.send_text_message(phone_number, settings.ERROR_REPLY_TEXT)
+    except Exception as e:
+        logger.error(f"❌ Falha ao enviar mensagem de erro para o cliente: {str(e)}")
+
+def _notify_busy(app_state, phone_number: str):
+    """Avisa em segundo plano o cliente cuja mensagem foi recusada, se ainda não foi avisado"""
+    admission = app_state.admission_controller
+    if admission.claim_busy_notice(phone_number):
+        _spawn(_send_busy_notice(phone_number, admission))
+
+async def _send_busy_notice(phone_number: str, admission):
+    """Avisa o cliente que a mensagem não foi processada por sobrecarga"""
+    try:
+        await evolution_service.send_text_message(phone_number, settings.BUSY_REPLY_TEXT)
+    except Exception as e:
+        logger.error(f"❌ Falha ao enviar aviso de sobrecarga: {str(e)}")
+    finally:
+        admission.release_busy_notice()
+
+def _spawn(coro):
+    """Executa uma corrotina em segundo plano mantendo a referência até terminar"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
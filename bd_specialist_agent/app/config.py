@@ -12,6 +12,13 @@ class Settings(BaseSettings):
     EVOLUTION_API_URL: str = os.getenv("EVOLUTION_API_URL", "http://localhost:8080")
     EVOLUTION_API_KEY: str = os.getenv("EVOLUTION_API_KEY", "")
     EVOLUTION_INSTANCE: str = os.getenv("EVOLUTION_INSTANCE", "bd-specialist")
+    EVOLUTION_INSTANCES: str = os.getenv("EVOLUTION_INSTANCES", "")  # pool separado por vírgula; vazio = só EVOLUTION_INSTANCE
+    EVOLUTION_SEND_RATE_PER_SECOND: float = float(os.getenv("EVOLUTION_SEND_RATE_PER_SECOND", 2))  # por instância
+    EVOLUTION_SEND_BURST: int = int(os.getenv("EVOLUTION_SEND_BURST", 5))
+    EVOLUTION_SEND_MAX_RETRIES: int = int(os.getenv("EVOLUTION_SEND_MAX_RETRIES", 3))
+    EVOLUTION_RETRY_BASE_SECONDS: float = float(os.getenv("EVOLUTION_RETRY_BASE_SECONDS", 0.5))
+    EVOLUTION_RETRY_MAX_SECONDS: float = float(os.getenv("EVOLUTION_RETRY_MAX_SECONDS", 10))
+    EVOLUTION_UPLOAD_REPLAY_MAX_BYTES: int = int(os.getenv("EVOLUTION_UPLOAD_REPLAY_MAX_BYTES", 16 * 1024 * 1024))  # acima disso o upload em streaming não é refeito
     
     # External Services
     STT_SERVICE_URL: str = os.getenv("STT_SERVICE_URL", "http://localhost:8001/v1")
@@ -70,11 +77,116 @@ class Settings(BaseSettings):
     
     # Audio Settings
     MAX_AUDIO_SIZE_MB: int = 25
-    SUPPORTED_AUDIO_FORMATS: List[str] = [".mp3", ".wav", ".ogg", ".m4a"]
+    SUPPORTED_AUDIO_FORMATS: List[str] = [".mp3", ".wav", ".ogg", ".m4a", ".aac"]
+    AUDIO_SPOOL_MAX_BYTES: int = int(os.getenv("AUDIO_SPOOL_MAX_BYTES", 5 * 1024 * 1024))  # acima disso o buffer vai para disco
+    FFMPEG_MAX_PROCESSES: int = int(os.getenv("FFMPEG_MAX_PROCESSES", 0))  # 0 = número de CPUs
+    
+    # Voice Activity Detection (silence trimming before STT)
+    VAD_ENABLED: bool = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    VAD_SAMPLE_RATE: int = 16000
+    VAD_FRAME_MS: int = int(os.getenv("VAD_FRAME_MS", 30))
+    VAD_ENERGY_THRESHOLD_DB: float = float(os.getenv("VAD_ENERGY_THRESHOLD_DB", -40))  # dBFS
+    VAD_PADDING_MS: int = int(os.getenv("VAD_PADDING_MS", 200))
+    VAD_MIN_SPEECH_MS: int = int(os.getenv("VAD_MIN_SPEECH_MS", 300))
+    
+    # HTTP Client Pool Settings (one long-lived session per upstream)
+    HTTP_POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", 100))
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 20))
+    HTTP_KEEPALIVE_TIMEOUT: float = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))
+    HTTP_DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", 300))
+    
+    # Upstream Resilience (circuit breakers for STT/TTS/Evolution, hedged requests for STT/TTS)
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", 30))
+    STT_HEDGE_ENABLED: bool = os.getenv("STT_HEDGE_ENABLED", "false").lower() == "true"
+    TTS_HEDGE_ENABLED: bool = os.getenv("TTS_HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_PERCENTILE: float = float(os.getenv("HEDGE_PERCENTILE", 95))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", 20))  # antes disso não há hedge
+    
+    # STT Settings
+    STT_MODEL: str = os.getenv("STT_MODEL", "whisper-1")  # Required by OpenAI-compatible API
+    STT_LANGUAGE: str = os.getenv("STT_LANGUAGE", "pt")
+    STT_CACHE_ENABLED: bool = os.getenv("STT_CACHE_ENABLED", "true").lower() == "true"
+    STT_CACHE_MAX_ENTRIES: int = int(os.getenv("STT_CACHE_MAX_ENTRIES", 1000))
+    STT_CACHE_DIR: str = os.getenv("STT_CACHE_DIR", "")  # vazio = somente memória
+    STT_CACHE_DISK_MAX_MB: int = int(os.getenv("STT_CACHE_DISK_MAX_MB", 50))
+    STT_CHUNK_ENABLED: bool = os.getenv("STT_CHUNK_ENABLED", "true").lower() == "true"
+    STT_CHUNK_MAX_SECONDS: float = float(os.getenv("STT_CHUNK_MAX_SECONDS", 30))
+    STT_CHUNK_SEARCH_SECONDS: float = float(os.getenv("STT_CHUNK_SEARCH_SECONDS", 5))
+    STT_CHUNK_OVERLAP_SECONDS: float = float(os.getenv("STT_CHUNK_OVERLAP_SECONDS", 1))
+    STT_CHUNK_CONCURRENCY: int = int(os.getenv("STT_CHUNK_CONCURRENCY", 4))
     
     # TTS Settings
     DEFAULT_VOICE: str = "pt_BR-faber-medium"
     TTS_SPEED: float = 1.0
+    TTS_STREAMING_UPLOAD: bool = os.getenv("TTS_STREAMING_UPLOAD", "true").lower() == "true"  # TTS -> sendMedia sem arquivo (Opus é codificado em memória antes)
+    TTS_SEGMENT_ENABLED: bool = os.getenv("TTS_SEGMENT_ENABLED", "true").lower() == "true"
+    TTS_SEGMENT_MAX_CHARS: int = int(os.getenv("TTS_SEGMENT_MAX_CHARS", 300))
+    TTS_SEGMENT_MIN_CHARS: int = int(os.getenv("TTS_SEGMENT_MIN_CHARS", 40))
+    TTS_SEGMENT_CONCURRENCY: int = int(os.getenv("TTS_SEGMENT_CONCURRENCY", 4))
+    TTS_SEGMENT_PAUSE_MS: int = int(os.getenv("TTS_SEGMENT_PAUSE_MS", 150))
+    TTS_AGENT_STREAMING: bool = os.getenv("TTS_AGENT_STREAMING", "true").lower() == "true"  # frase a frase se o agente fizer streaming
+    TTS_OUTPUT_FORMAT: str = os.getenv("TTS_OUTPUT_FORMAT", "opus")  # opus (nota de voz OGG) ou wav
+    TTS_OPUS_BITRATE_KBPS: int = int(os.getenv("TTS_OPUS_BITRATE_KBPS", 24))
+    TTS_OPUS_SAMPLE_RATE: int = 48000
+    TTS_CACHE_ENABLED: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_MAX_ENTRIES: int = int(os.getenv("TTS_CACHE_MAX_ENTRIES", 64))
+    TTS_CACHE_MAX_ITEM_KB: int = int(os.getenv("TTS_CACHE_MAX_ITEM_KB", 1024))
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "")  # vazio = somente memória
+    TTS_CACHE_DISK_MAX_MB: int = int(os.getenv("TTS_CACHE_DISK_MAX_MB", 200))
+    TTS_PREWARM_PHRASES: List[str] = [
+        "Olá! Como posso ajudar com seus dados hoje?",
+        "Posso ajudar em mais alguma coisa?",
+        "Obrigado pelo contato. Até logo!",
+    ]
+    
+    # Fixed Replies (also pre-synthesized into the TTS cache at startup)
+    ERROR_REPLY_TEXT: str = (
+        "Desculpe, ocorreu um erro ao processar sua consulta. "
+        "Tente novamente em alguns instantes ou entre em contato com o suporte."
+    )
+    NOT_UNDERSTOOD_REPLY_TEXT: str = (
+        "Desculpe, não consegui entender o áudio. Poderia repetir ou enviar uma mensagem de texto?"
+    )
+    SILENT_AUDIO_REPLY_TEXT: str = (
+        "Seu áudio chegou sem som. Poderia gravar novamente ou enviar sua pergunta por texto?"
+    )
+    BUSY_REPLY_TEXT: str = (
+        "Recebemos sua mensagem, mas estamos com muitas solicitações no momento. "
+        "Por favor, envie novamente em alguns minutos."
+    )
+    
+    # Job Queue Settings
+    JOB_QUEUE_MAX_SIZE: int = int(os.getenv("JOB_QUEUE_MAX_SIZE", 100))
+    JOB_QUEUE_WORKERS: int = int(os.getenv("JOB_QUEUE_WORKERS", 4))
+    JOB_TIMEOUT_SECONDS: int = int(os.getenv("JOB_TIMEOUT_SECONDS", 300))
+    JOB_HISTORY_SIZE: int = 50
+    
+    # Job Journal (crash-resumable pipeline checkpoints)
+    JOB_JOURNAL_PATH: str = os.getenv("JOB_JOURNAL_PATH", "")  # vazio = desativado
+    JOB_JOURNAL_MAX_ATTEMPTS: int = int(os.getenv("JOB_JOURNAL_MAX_ATTEMPTS", 3))
+    JOB_JOURNAL_MAX_AGE_SECONDS: float = float(os.getenv("JOB_JOURNAL_MAX_AGE_SECONDS", 3600))  # não retoma jobs mais antigos
+    
+    # Reply Modality ("auto" = answer in the modality of the customer's last message)
+    REPLY_MODALITY: str = os.getenv("REPLY_MODALITY", "auto")  # auto, text, audio
+    CONVERSATION_MODE_MAX_ENTRIES: int = int(os.getenv("CONVERSATION_MODE_MAX_ENTRIES", 10000))
+    CONVERSATION_MODE_TTL_SECONDS: int = int(os.getenv("CONVERSATION_MODE_TTL_SECONDS", 86400))
+    
+    # Voice-Note Coalescing (debounce window per customer)
+    VOICE_COALESCE_WINDOW_SECONDS: float = float(os.getenv("VOICE_COALESCE_WINDOW_SECONDS", 0))  # 0 = desativado
+    VOICE_COALESCE_MAX_WAIT_SECONDS: float = float(os.getenv("VOICE_COALESCE_MAX_WAIT_SECONDS", 10))
+    VOICE_COALESCE_MAX_BATCH: int = int(os.getenv("VOICE_COALESCE_MAX_BATCH", 5))
+    
+    # Admission Control (load shedding in front of the audio pipeline)
+    ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", 4))
+    ADMISSION_MAX_QUEUE_DEPTH: int = int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", 20))
+    BUSY_NOTICE_TTL_SECONDS: int = int(os.getenv("BUSY_NOTICE_TTL_SECONDS", 300))  # um aviso por cliente nesse intervalo
+    BUSY_NOTICE_MAX_PENDING: int = int(os.getenv("BUSY_NOTICE_MAX_PENDING", 10))  # avisos aguardando envio; acima disso são descartados
+    
+    # Webhook Idempotency Settings
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", 10000))
+    IDEMPOTENCY_DB_PATH: str = os.getenv("IDEMPOTENCY_DB_PATH", "")  # vazio = somente memória
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
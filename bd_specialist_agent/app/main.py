@@ -1,17 +1,28 @@
 # app/main.py
 import os
+import asyncio
 import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import settings
-from app.api.webhook import router as webhook_router
+from app.api.webhook import router as webhook_router, resume_journaled_jobs, submit_voice_batch
 from app.api.connections import router as connections_router
 from app.api.status import router as status_router
+from app.api.jobs import router as jobs_router
+from app.api.metrics import router as metrics_router
 #from app.api.health import router as health_router
 #from agents.db_specialist_agent import DBSpecialistAgent
 from database.connections import DatabaseManager
+from services.job_queue import JobQueue
+from services.admission_control import AdmissionController
+from services.job_journal import JobJournal
+from services.voice_coalescer import VoiceCoalescer
+from services.conversation_modes import ConversationModes
+from services.idempotency_cache import IdempotencyCache
+from services.http_client import http_pool
+from services.tts_service import TTSService
 from utils.logger import setup_logging
 
 # Setup logging
@@ -21,11 +32,16 @@ logger = logging.getLogger(__name__)
 # Global instances
 db_manager = None
 specialist_agent = None
+job_queue = None
+idempotency_cache = None
+job_journal = None
+voice_coalescer = None
+tts_prewarm_task = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gerencia o ciclo de vida da aplicação"""
-    global db_manager, specialist_agent
+    global db_manager, specialist_agent, job_queue, idempotency_cache, job_journal, voice_coalescer, tts_prewarm_task
     
     logger.info("🚀 Iniciando BD Specialist Agent...")
     
@@ -37,16 +53,65 @@ async def lifespan(app: FastAPI):
     #specialist_agent = DBSpecialistAgent(db_manager)
     #await specialist_agent.initialize()
     
+    # Initialize pooled HTTP sessions (Evolution, STT, TTS)
+    await http_pool.start()
+    
+    # Pre-synthesize fixed and frequent replies into the TTS cache (in background)
+    tts_prewarm_task = asyncio.create_task(TTSService().prewarm([
+        settings.ERROR_REPLY_TEXT,
+        settings.NOT_UNDERSTOOD_REPLY_TEXT,
+        settings.SILENT_AUDIO_REPLY_TEXT,
+        *settings.TTS_PREWARM_PHRASES,
+    ]))
+    
+    # Initialize webhook job queue
+    job_queue = JobQueue()
+    await job_queue.start()
+    
+    # Initialize admission control for the audio pipeline
+    admission_controller = AdmissionController()
+    
+    # Initialize webhook idempotency index
+    idempotency_cache = IdempotencyCache()
+    idempotency_cache.open()
+    
+    # Initialize crash-resumable job journal
+    job_journal = JobJournal()
+    job_journal.open()
+    
+    # Initialize per-conversation reply modality (text or audio)
+    conversation_modes = ConversationModes()
+    
+    # Initialize per-customer voice-note coalescing window
+    voice_coalescer = VoiceCoalescer(
+        on_flush=lambda phone_number, messages: submit_voice_batch(app.state, phone_number, messages)
+    )
+    
     # Store in app state
     app.state.db_manager = db_manager
+    app.state.job_queue = job_queue
+    app.state.admission_controller = admission_controller
+    app.state.idempotency_cache = idempotency_cache
+    app.state.job_journal = job_journal
+    app.state.voice_coalescer = voice_coalescer
+    app.state.conversation_modes = conversation_modes
     #app.state.specialist_agent = specialist_agent
     
+    # Resume voice jobs interrupted by the last shutdown
+    resume_journaled_jobs(app.state)
+    
     logger.info("✅ BD Specialist Agent iniciado com sucesso!")
     
     yield
     
     # Cleanup
     logger.info("🔄 Encerrando aplicação...")
+    tts_prewarm_task.cancel()
+    voice_coalescer.flush_all()
+    await job_queue.stop()
+    idempotency_cache.close()
+    job_journal.close()
+    await http_pool.close()
     await db_manager.close_all_connections()
 
 # Create FastAPI app
@@ -70,6 +135,8 @@ app.add_middleware(
 app.include_router(webhook_router, prefix="/webhook", tags=["Webhook"])
 app.include_router(connections_router, prefix="/connections", tags=["Database Connections"])
 app.include_router(status_router, prefix="/status", tags=["Service Status"])
+app.include_router(jobs_router, prefix="/jobs", tags=["Job Queue"])
+app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
 #app.include_router(health_router, prefix="/health", tags=["Health"])
 
 @app.get("/")
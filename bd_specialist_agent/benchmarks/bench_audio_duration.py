@@ -0,0 +1,102 @@
+# benchmarks/bench_audio_duration.py
+"""Micro-benchmark: duração via cabeçalho do container vs. ffprobe.
+
+Uso (a partir de bd_specialist_agent/):
+    python -m benchmarks.bench_audio_duration [arquivos de áudio ...] [--runs N]
+
+Sem arquivos, gera um WAV e um MP3 CBR sintéticos em um diretório temporário.
+"""
+import argparse
+import asyncio
+import shutil
+import statistics
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import List
+
+from services.audio_processor import AudioProcessor
+from utils.audio_headers import read_file_duration
+
+def _write_sample_files(directory: Path, seconds: int = 60) -> List[str]:
+    wav_path = directory / "sample.wav"
+    with wave.open(str(wav_path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x00" * 16000 * seconds)
+
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding: 417-byte frames of 1152 samples
+    mp3_path = directory / "sample.mp3"
+    frame = b"\xff\xfb\x90\x00" + b"\x00" * 413
+    mp3_path.write_bytes(frame * int(seconds * 44100 / 1152))
+
+    return [str(wav_path), str(mp3_path)]
+
+async def _ffprobe_duration(file_path: str) -> float:
+    process = await asyncio.create_subprocess_exec(
+        "ffprobe", "-v", "quiet",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        file_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, _ = await process.communicate()
+    return float(stdout.decode().strip() or 0)
+
+def _timed_runs(func, runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def _report(label: str, duration: float, timings: List[float]):
+    print(
+        f"  {label:<8} duração={duration:8.3f}s  "
+        f"mediana={statistics.median(timings):8.3f}ms  "
+        f"p95={sorted(timings)[int(len(timings) * 0.95) - 1]:8.3f}ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="arquivos de áudio (padrão: WAV e MP3 sintéticos)")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    has_ffprobe = shutil.which("ffprobe") is not None
+    if not has_ffprobe:
+        print("⚠️ ffprobe não encontrado: medindo apenas o parser de cabeçalho")
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = args.files or _write_sample_files(Path(directory))
+
+        for file_path in files:
+            print(f"{file_path}")
+
+            native = read_file_duration(file_path)
+            if native is None:
+                print("  header   formato não reconhecido (AudioProcessor usa ffprobe)")
+            else:
+                _report("header", native, _timed_runs(lambda: read_file_duration(file_path), args.runs))
+
+            if has_ffprobe:
+                loop = asyncio.new_event_loop()
+                try:
+                    probed = loop.run_until_complete(_ffprobe_duration(file_path))
+                    ffprobe_runs = max(1, args.runs // 10)
+                    timings = _timed_runs(
+                        lambda: loop.run_until_complete(_ffprobe_duration(file_path)), ffprobe_runs
+                    )
+                    _report("ffprobe", probed, timings)
+
+                    resolved = loop.run_until_complete(AudioProcessor.get_audio_duration(file_path))
+                    print(f"  AudioProcessor.get_audio_duration -> {resolved:.3f}s")
+                finally:
+                    loop.close()
+
+if __name__ == "__main__":
+    main()
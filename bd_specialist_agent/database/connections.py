@@ -9,6 +9,7 @@ from contextlib import asynccontextmanager
 
 from app.config import settings
 from utils.exceptions import DatabaseError
+from utils.metrics import track_db_query
 
 logger = logging.getLogger(__name__)
 
@@ -261,7 +262,7 @@ class DatabaseManager:
         engine = self.engines[db_name]
         
         try:
-            with engine.connect() as conn:
+            with track_db_query(db_name), engine.connect() as conn:
                 result = conn.execute(text(query), params or {})
                 
                 # Convert result to list of dictionaries
@@ -0,0 +1,91 @@
+# services/admission_control.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from app.config import settings
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+class AdmissionController:
+    """Controle de admissão do pipeline de áudio.
+
+    Limita quantos pipelines rodam ao mesmo tempo (`slot`) e quantos jobs
+    admitidos podem aguardar por um slot (`try_admit`); acima disso a mensagem
+    é recusada antes de consumir STT, LLM ou TTS. O aviso de sobrecarga vai no
+    máximo uma vez por cliente a cada BUSY_NOTICE_TTL_SECONDS, com no máximo
+    BUSY_NOTICE_MAX_PENDING avisos na fila de envio.
+    """
+
+    def __init__(self, max_in_flight: Optional[int] = None, max_queue_depth: Optional[int] = None):
+        self.max_in_flight = max_in_flight or settings.ADMISSION_MAX_IN_FLIGHT
+        self.max_queue_depth = max_queue_depth or settings.ADMISSION_MAX_QUEUE_DEPTH
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        # Customers already told the system is busy, and notices still being sent
+        self._notified = LRUCache(settings.CONVERSATION_MODE_MAX_ENTRIES, settings.BUSY_NOTICE_TTL_SECONDS)
+        self.max_pending_notices = settings.BUSY_NOTICE_MAX_PENDING
+        self.pending_notices = 0
+        self.notices_suppressed = 0
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+
+    def try_admit(self, force: bool = False) -> bool:
+        """Reserva um lugar na fila de espera; retorna False se o sistema estiver acima da capacidade"""
+        if not force and self.waiting >= self.max_queue_depth:
+            self.shed += 1
+            return False
+
+        self.waiting += 1
+        self.admitted += 1
+        return True
+
+    def cancel(self):
+        """Libera o lugar de um job admitido que não chegou a ser executado"""
+        self.waiting = max(0, self.waiting - 1)
+
+    def claim_busy_notice(self, phone_number: str) -> bool:
+        """Reserva o envio de um aviso de sobrecarga; False se o cliente já foi avisado ou a fila de avisos está cheia"""
+        if self.pending_notices >= self.max_pending_notices or self._notified.get(phone_number) is not None:
+            self.notices_suppressed += 1
+            return False
+
+        self._notified.set(phone_number, True)
+        self.pending_notices += 1
+        return True
+
+    def release_busy_notice(self):
+        """Libera a vaga de um aviso de sobrecarga enviado (ou que falhou)"""
+        self.pending_notices = max(0, self.pending_notices - 1)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Aguarda um slot de execução para um job previamente admitido"""
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting = max(0, self.waiting - 1)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "waiting": self.waiting,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "pending_notices": self.pending_notices,
+            "notices_suppressed": self.notices_suppressed,
+        }
@@ -1,14 +1,65 @@
 # services/audio_processor.py
 import logging
 import asyncio
+import os
 import subprocess
+import wave
 from pathlib import Path
-from typing import Optional
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
 
-from utils.exceptions import AudioProcessingError
+import numpy as np
+
+from app.config import settings
+from utils.audio_buffer import buffer_size, new_audio_buffer
+from utils.audio_headers import read_file_duration, sniff_format
+from utils.exceptions import AudioProcessingError, SilentAudioError
+from utils.metrics import VAD_SILENT_CLIPS, VAD_TRIMMED_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Codec and container per target format for piped (stdout) output
+OUTPUT_FORMATS = {
+    "wav": ("pcm_s16le", "wav"),
+    "mp3": ("libmp3lame", "mp3"),
+    "pcm": ("pcm_s16le", "s16le"),
+    "opus": ("libopus", "ogg"),
+}
+
+# Bounds concurrent FFmpeg processes across all conversions
+_ffmpeg_slots = asyncio.Semaphore(settings.FFMPEG_MAX_PROCESSES or os.cpu_count() or 1)
+
+def _ffmpeg_pipe_command(target_format: str, sample_rate: int, bitrate_kbps: Optional[int] = None) -> List[str]:
+    """Monta o comando FFmpeg que lê de stdin e escreve `target_format` (mono) em stdout"""
+    if target_format not in OUTPUT_FORMATS:
+        raise AudioProcessingError(f"Formato de saída não suportado: {target_format}")
+    
+    codec, container = OUTPUT_FORMATS[target_format]
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-f", container,
+        "-acodec", codec,
+        "-ar", str(sample_rate),
+        "-ac", "1"
+    ]
+    if bitrate_kbps:
+        cmd += ["-b:a", f"{bitrate_kbps}k"]
+    if codec == "libopus":
+        # Speech-tuned Opus, like WhatsApp's own voice notes
+        cmd += ["-application", "voip"]
+    return cmd + ["pipe:1"]
+
+async def _spawn_ffmpeg(cmd: List[str]) -> asyncio.subprocess.Process:
+    try:
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+    except OSError as e:
+        raise AudioProcessingError(f"FFmpeg indisponível: {str(e)}")
+
 class AudioProcessor:
     """Utilitários para processamento de áudio"""
     
@@ -33,13 +84,14 @@ class AudioProcessor:
             ]
             
             # Run FFmpeg asynchronously
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
+            async with _ffmpeg_slots:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                
+                stdout, stderr = await process.communicate()
             
             if process.returncode != 0:
                 error_msg = stderr.decode() if stderr else "Unknown FFmpeg error"
@@ -57,7 +109,16 @@ class AudioProcessor:
     
     @staticmethod
     async def get_audio_duration(file_path: str) -> float:
-        """Obtém duração do áudio em segundos"""
+        """Obtém duração do áudio em segundos (cabeçalho do container; ffprobe para outros formatos)"""
+        
+        # WAV, OGG and MP3 carry the duration in their headers: no process needed
+        try:
+            duration = read_file_duration(file_path)
+            if duration is not None:
+                return duration
+        except OSError as e:
+            logger.warning(f"⚠️ Erro ao ler cabeçalho de áudio: {str(e)}")
+            return 0.0
         
         try:
             cmd = [
@@ -67,13 +128,14 @@ class AudioProcessor:
                 file_path
             ]
             
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
+            async with _ffmpeg_slots:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                
+                stdout, stderr = await process.communicate()
             
             if process.returncode != 0:
                 raise AudioProcessingError("Failed to get audio duration")
@@ -87,23 +149,177 @@ class AudioProcessor:
     
     @staticmethod
     def validate_audio_file(file_path: str, max_size_mb: int = 25) -> bool:
-        """Valida arquivo de áudio"""
+        """Valida arquivo de áudio pelo conteúdo (a extensão não é confiável: downloads são sempre .ogg)"""
         
         path = Path(file_path)
         
         if not path.exists():
             return False
         
-        # Check file size
-        size_mb = path.stat().st_size / (1024 * 1024)
+        with open(path, "rb") as f:
+            return AudioProcessor.validate_audio_buffer(f, max_size_mb)
+    
+    @staticmethod
+    def validate_audio_buffer(audio_buffer: BinaryIO, max_size_mb: int = 25) -> bool:
+        """Valida áudio em buffer (ou arquivo aberto): tamanho e formato pelos primeiros bytes"""
+        
+        # Check size
+        size_mb = buffer_size(audio_buffer) / (1024 * 1024)
         if size_mb > max_size_mb:
             logger.warning(f"⚠️ Arquivo muito grande: {size_mb:.2f}MB")
             return False
         
-        # Check file extension
-        valid_extensions = ['.mp3', '.wav', '.ogg', '.m4a', '.aac']
-        if path.suffix.lower() not in valid_extensions:
-            logger.warning(f"⚠️ Formato não suportado: {path.suffix}")
+        # Check content (magic bytes)
+        audio_format = sniff_format(audio_buffer)
+        if audio_format is None or f".{audio_format}" not in settings.SUPPORTED_AUDIO_FORMATS:
+            logger.warning(f"⚠️ Formato não suportado: {audio_format or 'conteúdo não reconhecido'}")
             return False
         
         return True
+    
+    @staticmethod
+    async def convert_audio_bytes(
+        audio_bytes: bytes,
+        target_format: str = "wav",
+        sample_rate: int = 16000,
+        bitrate_kbps: Optional[int] = None
+    ) -> bytes:
+        """Converte áudio em memória via FFmpeg (stdin -> stdout), sem arquivos temporários"""
+        
+        cmd = _ffmpeg_pipe_command(target_format, sample_rate, bitrate_kbps)
+        
+        async with _ffmpeg_slots:
+            process = await _spawn_ffmpeg(cmd)
+            stdout, stderr = await process.communicate(input=audio_bytes)
+        
+        if process.returncode != 0:
+            error_msg = stderr.decode() if stderr else "Unknown FFmpeg error"
+            raise AudioProcessingError(f"FFmpeg error: {error_msg}")
+        
+        return stdout
+    
+    @staticmethod
+    async def decode_pcm(audio_buffer: BinaryIO, sample_rate: int = 16000) -> np.ndarray:
+        """Decodifica o buffer de áudio para PCM 16 bits mono via FFmpeg (stdin -> stdout)"""
+        
+        audio_buffer.seek(0)
+        audio_bytes = audio_buffer.read()
+        audio_buffer.seek(0)
+        
+        pcm = await AudioProcessor.convert_audio_bytes(audio_bytes, "pcm", sample_rate)
+        return np.frombuffer(pcm, dtype=np.int16)
+    
+    @staticmethod
+    def frame_energy_db(samples: np.ndarray, frame_length: int) -> np.ndarray:
+        """Energia RMS (dBFS) de cada quadro completo de `frame_length` amostras"""
+        frame_count = len(samples) // frame_length
+        if frame_count == 0:
+            return np.empty(0, dtype=np.float32)
+        
+        # One row per frame; the trailing partial frame is left out
+        frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+        frames = frames.astype(np.float32) / 32768.0
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        return 20 * np.log10(np.maximum(rms, 1e-10))
+    
+    @staticmethod
+    def detect_speech(
+        samples: np.ndarray,
+        sample_rate: int,
+        frame_ms: int,
+        threshold_db: float,
+        padding_ms: int
+    ) -> Optional[Tuple[int, int, float]]:
+        """Localiza a fala por energia (RMS em dBFS por quadro).
+
+        Retorna (amostra inicial, amostra final, segundos de quadros com fala),
+        com `padding_ms` de margem nas bordas, ou None se nenhum quadro passar do limiar.
+        """
+        frame_length = sample_rate * frame_ms // 1000
+        energy_db = AudioProcessor.frame_energy_db(samples, frame_length)
+        
+        voiced = np.flatnonzero(energy_db > threshold_db)
+        if voiced.size == 0:
+            return None
+        
+        padding = padding_ms * sample_rate // 1000
+        start = max(0, int(voiced[0]) * frame_length - padding)
+        end = min(len(samples), (int(voiced[-1]) + 1) * frame_length + padding)
+        return start, end, voiced.size * frame_ms / 1000
+    
+    @staticmethod
+    def split_at_silence(
+        samples: np.ndarray,
+        sample_rate: int,
+        max_segment_seconds: float,
+        search_seconds: float,
+        frame_ms: int = 30
+    ) -> List[int]:
+        """Escolhe pontos de corte (índices de amostra) para segmentos de até `max_segment_seconds`.
+
+        Cada corte cai no quadro de menor energia dentro dos últimos `search_seconds`
+        do segmento, para não partir palavras ao meio.
+        """
+        frame_length = sample_rate * frame_ms // 1000
+        energy_db = AudioProcessor.frame_energy_db(samples, frame_length)
+        max_frames = max(1, int(max_segment_seconds * 1000 / frame_ms))
+        search_frames = max(1, min(max_frames - 1, int(search_seconds * 1000 / frame_ms)))
+        
+        cuts = []
+        start = 0
+        while len(energy_db) - start > max_frames:
+            window_end = start + max_frames
+            window_start = window_end - search_frames
+            quietest = window_start + int(np.argmin(energy_db[window_start:window_end]))
+            cuts.append(quietest * frame_length)
+            start = quietest
+        
+        return cuts
+    
+    @staticmethod
+    async def trim_silence(audio_buffer: BinaryIO) -> Tuple[BinaryIO, Dict[str, Any]]:
+        """Remove o silêncio do início e do fim do áudio antes do STT.
+
+        Retorna um novo buffer WAV (16 kHz mono) só com o trecho falado e um resumo
+        com as durações; levanta SilentAudioError se o clipe não tiver fala.
+        """
+        sample_rate = settings.VAD_SAMPLE_RATE
+        samples = await AudioProcessor.decode_pcm(audio_buffer, sample_rate)
+        original_seconds = len(samples) / sample_rate
+        
+        speech = AudioProcessor.detect_speech(
+            samples,
+            sample_rate,
+            settings.VAD_FRAME_MS,
+            settings.VAD_ENERGY_THRESHOLD_DB,
+            settings.VAD_PADDING_MS
+        )
+        
+        if speech is None or speech[2] * 1000 < settings.VAD_MIN_SPEECH_MS:
+            VAD_SILENT_CLIPS.inc()
+            raise SilentAudioError(f"Nenhuma fala detectada em {original_seconds:.2f}s de áudio")
+        
+        start, end, speech_seconds = speech
+        trimmed = samples[start:end]
+        
+        summary = {
+            "original_seconds": round(original_seconds, 3),
+            "kept_seconds": round(len(trimmed) / sample_rate, 3),
+            "removed_seconds": round((len(samples) - len(trimmed)) / sample_rate, 3),
+            "speech_seconds": round(speech_seconds, 3),
+        }
+        VAD_TRIMMED_SECONDS.observe(summary["removed_seconds"])
+        logger.info(
+            f"✂️ VAD: {summary['removed_seconds']:.2f}s de silêncio removidos "
+            f"({summary['original_seconds']:.2f}s -> {summary['kept_seconds']:.2f}s)"
+        )
+        
+        trimmed_buffer = new_audio_buffer(settings.AUDIO_SPOOL_MAX_BYTES)
+        with wave.open(trimmed_buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(trimmed.tobytes())
+        trimmed_buffer.seek(0)
+        
+        return trimmed_buffer, summary
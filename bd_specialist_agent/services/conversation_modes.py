@@ -0,0 +1,63 @@
+# services/conversation_modes.py
+import logging
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+TEXT = "text"
+AUDIO = "audio"
+
+class ConversationModes:
+    """Escolhe a modalidade da resposta (texto ou áudio) por conversa.
+
+    Com REPLY_MODALITY=auto a conversa responde na modalidade da última mensagem
+    recebida do cliente (texto digitado -> texto, nota de voz -> áudio); "text" e
+    "audio" fixam a modalidade para todas as conversas.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.policy = (policy or settings.REPLY_MODALITY).lower()
+        if self.policy not in ("auto", TEXT, AUDIO):
+            logger.warning(f"⚠️ REPLY_MODALITY inválido ({self.policy}), usando 'auto'")
+            self.policy = "auto"
+
+        self._modes = LRUCache(
+            max_entries or settings.CONVERSATION_MODE_MAX_ENTRIES,
+            ttl_seconds or settings.CONVERSATION_MODE_TTL_SECONDS
+        )
+
+        self.text_replies = 0
+        self.audio_replies = 0
+
+    def record_inbound(self, phone_number: str, modality: str):
+        """Registra a modalidade da última mensagem recebida na conversa"""
+        self._modes.set(phone_number, modality)
+
+    def reply_modality(self, phone_number: str, default: str = AUDIO) -> str:
+        """Retorna a modalidade em que a conversa deve ser respondida"""
+        if self.policy != "auto":
+            modality = self.policy
+        else:
+            modality = self._modes.get(phone_number, default)
+
+        if modality == TEXT:
+            self.text_replies += 1
+        else:
+            self.audio_replies += 1
+        return modality
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "text_replies": self.text_replies,
+            "audio_replies": self.audio_replies,
+            "conversations": self._modes.get_stats(),
+        }
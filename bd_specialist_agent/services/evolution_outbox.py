@@ -0,0 +1,154 @@
+# services/evolution_outbox.py
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.config import settings
+from utils.exceptions import UpstreamError
+from utils.metrics import EVOLUTION_OUTBOX_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class TokenBucket:
+    """Token bucket assíncrono: até `burst` envios de uma vez, reabastecido a `rate` por segundo"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> float:
+        """Aguarda um token; retorna quanto tempo esperou"""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited = delay
+                self._refill()
+            self._tokens -= 1
+        return waited
+
+class EvolutionOutbox:
+    """Outbox dos envios para uma instância da Evolution API.
+
+    Todo envio passa pelo token bucket da instância, é refeito com backoff exponencial
+    e jitter em falhas transitórias (conexão, 429, 5xx) e respeita a ordem por
+    destinatário: uma mensagem só sai depois que a anterior para o mesmo número foi
+    entregue ou descartada.
+    """
+
+    def __init__(
+        self,
+        instance: str,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None
+    ):
+        self.instance = instance
+        self.bucket = TokenBucket(
+            rate if rate is not None else settings.EVOLUTION_SEND_RATE_PER_SECOND,
+            burst or settings.EVOLUTION_SEND_BURST
+        )
+        self.max_retries = max_retries if max_retries is not None else settings.EVOLUTION_SEND_MAX_RETRIES
+        self.backoff_base = backoff_base or settings.EVOLUTION_RETRY_BASE_SECONDS
+        self.backoff_max = backoff_max or settings.EVOLUTION_RETRY_MAX_SECONDS
+
+        # Per-recipient lock and number of sends holding/waiting on it
+        self._recipients: Dict[str, list] = {}
+
+        self.sent = 0
+        self.retried = 0
+        self.dropped = 0
+        self.throttled_seconds = 0.0
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: espera aleatória entre 0 e o teto exponencial da tentativa"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _count(self, result: str):
+        EVOLUTION_OUTBOX_MESSAGES.labels(instance=self.instance, result=result).inc()
+
+    async def send(self, phone_number: str, operation: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """Executa `attempt` (uma chamada HTTP à Evolution) com rate limit, ordem por destinatário e retentativas"""
+
+        entry = self._recipients.setdefault(phone_number, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._deliver(phone_number, operation, attempt)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._recipients.pop(phone_number, None)
+
+    async def _deliver(self, phone_number: str, operation: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        tries = 0
+        while True:
+            self.throttled_seconds += await self.bucket.acquire()
+            try:
+                result = await attempt()
+            except UpstreamError as e:
+                if not e.retryable or tries >= self.max_retries:
+                    self.dropped += 1
+                    self._count("dropped")
+                    logger.error(f"❌ Envio {operation} para {phone_number} descartado após {tries + 1} tentativa(s): {str(e)}")
+                    raise
+
+                delay = self._backoff(tries)
+                tries += 1
+                self.retried += 1
+                self._count("retried")
+                logger.warning(
+                    f"🔁 Falha transitória no envio {operation} para {phone_number} "
+                    f"(tentativa {tries}/{self.max_retries}), repetindo em {delay:.2f}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            self.sent += 1
+            self._count("sent")
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "instance": self.instance,
+            "rate_per_second": self.bucket.rate,
+            "burst": self.bucket.burst,
+            "max_retries": self.max_retries,
+            "recipients_pending": len(self._recipients),
+            "sent": self.sent,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+        }
+
+# One outbox per Evolution instance, shared by every EvolutionService pointing at it
+_outboxes: Dict[str, EvolutionOutbox] = {}
+
+def outbox_for(instance: str) -> EvolutionOutbox:
+    outbox = _outboxes.get(instance)
+    if outbox is None:
+        outbox = _outboxes[instance] = EvolutionOutbox(instance)
+    return outbox
+
+def get_outbox_stats() -> Dict[str, Any]:
+    return {instance: outbox.get_stats() for instance, outbox in _outboxes.items()}
@@ -1,23 +1,38 @@
 # services/evolution_service.py
+import asyncio
 import logging
 import aiohttp
 import aiofiles
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, BinaryIO, Callable
 import time
 
 from app.config import settings
-from utils.exceptions import EvolutionAPIError
+from services.http_client import http_pool
+from services.evolution_outbox import outbox_for
+from services.instance_router import instance_guard, instance_router
+from services.resilience import upstream
+from utils.audio_buffer import ReplayableStream, new_audio_buffer
+from utils.exceptions import CircuitOpenError, EvolutionAPIError, UpstreamError
+from utils.metrics import observe_service_call
 
 logger = logging.getLogger(__name__)
 
 class EvolutionService:
-    """Serviço para interagir com a Evolution API (WhatsApp Gateway)"""
+    """Serviço para interagir com a Evolution API (WhatsApp Gateway).
+
+    Cada conversa é enviada pela instância que o hashing consistente atribui ao número
+    (com failover para a próxima do anel), passando pela outbox dessa instância
+    (rate limit, retentativas e ordem por destinatário).
+    """
     
     def __init__(self):
         self.base_url = settings.EVOLUTION_API_URL
         self.api_key = settings.EVOLUTION_API_KEY
-        self.instance = settings.EVOLUTION_INSTANCE
+        self.router = instance_router
+        self.instances = self.router.instances
+        # Media downloads are not tied to a routed instance, so they share one breaker
+        self.download_upstream = upstream("evolution")
         self.timeout = aiohttp.ClientTimeout(total=30)
         
         self.headers = {
@@ -25,48 +40,119 @@ class EvolutionService:
             "Content-Type": "application/json"
         }
     
+    @property
+    def circuit_state(self) -> str:
+        return self.router.circuit_state
+    
+    async def _send(
+        self,
+        phone_number: str,
+        operation: str,
+        post: Callable[[str], Awaitable[Dict[str, Any]]],
+        replayable: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """Envia pela instância da conversa; se ela estiver fora do ar, pelas próximas do anel.
+
+        `replayable` informa se o envio ainda pode ser refeito; quando False, a falha não é retentada.
+        """
+        
+        async def attempt(instance: str) -> Dict[str, Any]:
+            try:
+                return await instance_guard(instance).call(lambda: post(instance))
+            except UpstreamError as e:
+                # The breaker already counted the failure; the outbox and failover must not resend
+                if e.retryable and replayable is not None and not replayable():
+                    e.retryable = False
+                raise
+        
+        instances = self.router.route(phone_number)
+        for position, instance in enumerate(instances):
+            try:
+                result = await outbox_for(instance).send(
+                    phone_number,
+                    operation,
+                    lambda: attempt(instance)
+                )
+            except UpstreamError as e:
+                # Only an instance that is down is worth failing over from (not e.g. a 4xx)
+                instance_down = e.retryable or isinstance(e, CircuitOpenError)
+                if not instance_down or position == len(instances) - 1:
+                    raise
+                logger.warning(f"⚠️ Instância {instance} indisponível para {phone_number}: {str(e)}")
+                continue
+            
+            self.router.record(phone_number, instance, failover=position > 0)
+            return result
+    
     async def send_text_message(self, phone_number: str, text: str) -> Dict[str, Any]:
         """Envia mensagem de texto via WhatsApp"""
-        
+        return await self._send(
+            phone_number, "send_text", lambda instance: self._post_text(instance, phone_number, text)
+        )
+    
+    @observe_service_call("evolution", "send_text")
+    async def _post_text(self, instance: str, phone_number: str, text: str) -> Dict[str, Any]:
         try:
-            logger.info(f"📤 Enviando mensagem de texto para: {phone_number}")
+            logger.info(f"📤 Enviando mensagem de texto para: {phone_number} (instância {instance})")
             
-            url = f"{self.base_url}/message/sendText/{self.instance}"
+            url = f"{self.base_url}/message/sendText/{instance}"
             
             payload = {
                 "number": phone_number,
                 "text": text
             }
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(url, json=payload, headers=self.headers) as response:
-                    
-                    if response.status not in [200, 201]:
-                        error_text = await response.text()
-                        raise EvolutionAPIError(f"Evolution API error {response.status}: {error_text}")
-                    
-                    result = await response.json()
-                    logger.info("✅ Mensagem de texto enviada com sucesso")
-                    return result
+            session = http_pool.get("evolution")
+            async with session.post(url, json=payload, headers=self.headers, timeout=self.timeout) as response:
+                
+                if response.status not in [200, 201]:
+                    error_text = await response.text()
+                    raise EvolutionAPIError(f"Evolution API error {response.status}: {error_text}", status=response.status)
+                
+                result = await response.json()
+                logger.info("✅ Mensagem de texto enviada com sucesso")
+                return result
+        
+        except EvolutionAPIError:
+            raise
                     
-        except aiohttp.ClientError as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"❌ Erro de conexão Evolution API: {str(e)}")
             raise EvolutionAPIError(f"Erro de conexão: {str(e)}")
         
         except Exception as e:
             logger.error(f"❌ Erro inesperado ao enviar texto: {str(e)}")
-            raise EvolutionAPIError(f"Erro ao enviar mensagem: {str(e)}")
+            raise EvolutionAPIError(f"Erro ao enviar mensagem: {str(e)}", retryable=False)
     
-    async def send_audio_message(self, phone_number: str, audio_path: str) -> Dict[str, Any]:
+    async def send_audio_message(
+        self,
+        phone_number: str,
+        audio_path: str,
+        content_type: str = "audio/wav"
+    ) -> Dict[str, Any]:
         """Envia mensagem de áudio via WhatsApp"""
         
         if not Path(audio_path).exists():
-            raise EvolutionAPIError(f"Arquivo de áudio não encontrado: {audio_path}")
+            raise EvolutionAPIError(f"Arquivo de áudio não encontrado: {audio_path}", retryable=False)
         
+        return await self._send(
+            phone_number,
+            "send_media",
+            lambda instance: self._post_audio_file(instance, phone_number, audio_path, content_type)
+        )
+    
+    @observe_service_call("evolution", "send_media")
+    async def _post_audio_file(
+        self,
+        instance: str,
+        phone_number: str,
+        audio_path: str,
+        content_type: str
+    ) -> Dict[str, Any]:
         try:
-            logger.info(f"📤 Enviando áudio para: {phone_number}")
+            logger.info(f"📤 Enviando áudio para: {phone_number} (instância {instance})")
             
-            url = f"{self.base_url}/message/sendMedia/{self.instance}"
+            url = f"{self.base_url}/message/sendMedia/{instance}"
             
             # Prepare form data
             data = aiohttp.FormData()
@@ -77,30 +163,117 @@ class EvolutionService:
                 data.add_field('file', 
                              audio_content,
                              filename=Path(audio_path).name,
-                             content_type='audio/wav')
+                             content_type=content_type)
             
             # Headers without Content-Type for multipart
             headers = {"apikey": self.api_key}
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.post(url, data=data, headers=headers) as response:
-                    
-                    if response.status not in [200, 201]:
-                        error_text = await response.text()
-                        raise EvolutionAPIError(f"Evolution API error {response.status}: {error_text}")
-                    
-                    result = await response.json()
-                    logger.info("✅ Áudio enviado com sucesso")
-                    return result
+            session = http_pool.get("evolution")
+            async with session.post(url, data=data, headers=headers, timeout=self.timeout) as response:
+                
+                if response.status not in [200, 201]:
+                    error_text = await response.text()
+                    raise EvolutionAPIError(f"Evolution API error {response.status}: {error_text}", status=response.status)
+                
+                result = await response.json()
+                logger.info("✅ Áudio enviado com sucesso")
+                return result
+        
+        except EvolutionAPIError:
+            raise
                     
-        except aiohttp.ClientError as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"❌ Erro de conexão Evolution API: {str(e)}")
             raise EvolutionAPIError(f"Erro de conexão: {str(e)}")
         
         except Exception as e:
             logger.error(f"❌ Erro inesperado ao enviar áudio: {str(e)}")
-            raise EvolutionAPIError(f"Erro ao enviar áudio: {str(e)}")
+            raise EvolutionAPIError(f"Erro ao enviar áudio: {str(e)}", retryable=False)
+    
+    async def send_audio_stream(
+        self,
+        phone_number: str,
+        audio_chunks: AsyncIterator[bytes],
+        filename: str = "response.wav",
+        content_type: str = "audio/wav"
+    ) -> Dict[str, Any]:
+        """Envia áudio via WhatsApp repassando os blocos recebidos direto para o upload multipart.
+
+        Os blocos já enviados ficam guardados (até EVOLUTION_UPLOAD_REPLAY_MAX_BYTES) para que
+        uma retentativa refaça o upload do início; acima disso uma falha não é retentada.
+        """
+        
+        audio = ReplayableStream(
+            audio_chunks, settings.EVOLUTION_UPLOAD_REPLAY_MAX_BYTES, settings.AUDIO_SPOOL_MAX_BYTES
+        )
+        
+        try:
+            # Prime the first chunk so upstream failures (e.g. TTS) surface before the upload starts
+            if not await audio.prime():
+                raise EvolutionAPIError("Stream de áudio vazio", retryable=False)
+            
+            return await self._send(
+                phone_number,
+                "send_media",
+                lambda instance: self._post_audio_stream(instance, phone_number, audio, filename, content_type),
+                replayable=lambda: audio.replayable
+            )
+        finally:
+            audio.close()
     
+    @observe_service_call("evolution", "send_media")
+    async def _post_audio_stream(
+        self,
+        instance: str,
+        phone_number: str,
+        audio: ReplayableStream,
+        filename: str,
+        content_type: str
+    ) -> Dict[str, Any]:
+        if not audio.replayable:
+            raise EvolutionAPIError("Áudio em streaming acima do limite de reenvio", retryable=False)
+        
+        try:
+            logger.info(f"📤 Enviando áudio em streaming para: {phone_number} (instância {instance})")
+            
+            url = f"{self.base_url}/message/sendMedia/{instance}"
+            
+            data = aiohttp.FormData()
+            data.add_field('number', phone_number)
+            data.add_field('file',
+                         audio.replay(),
+                         filename=filename,
+                         content_type=content_type)
+            
+            # Headers without Content-Type for multipart
+            headers = {"apikey": self.api_key}
+            
+            session = http_pool.get("evolution")
+            async with session.post(url, data=data, headers=headers, timeout=self.timeout) as response:
+                
+                if response.status not in [200, 201]:
+                    error_text = await response.text()
+                    raise EvolutionAPIError(f"Evolution API error {response.status}: {error_text}", status=response.status)
+                
+                result = await response.json()
+                logger.info("✅ Áudio enviado com sucesso")
+                return result
+        
+        except EvolutionAPIError:
+            raise
+        
+        except Exception as e:
+            # A failed source stream (e.g. TTS) cannot be fixed by re-uploading
+            if audio.error is not None:
+                logger.error(f"❌ Erro na origem do áudio em streaming: {str(audio.error)}")
+                raise EvolutionAPIError(f"Erro ao gerar áudio: {str(audio.error)}", retryable=False)
+            if isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+                logger.error(f"❌ Erro de conexão Evolution API: {str(e)}")
+                raise EvolutionAPIError(f"Erro de conexão: {str(e)}")
+            logger.error(f"❌ Erro inesperado ao enviar áudio: {str(e)}")
+            raise EvolutionAPIError(f"Erro ao enviar áudio: {str(e)}", retryable=False)
+    
+    @observe_service_call("evolution", "download_media")
     async def download_audio(self, audio_url: str, phone_number: str) -> str:
         """Baixa arquivo de áudio do WhatsApp"""
         
@@ -113,38 +286,89 @@ class EvolutionService:
             output_path = Path("temp") / filename
             output_path.parent.mkdir(exist_ok=True)
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(audio_url, headers={"apikey": self.api_key}) as response:
-                    
-                    if response.status != 200:
-                        raise EvolutionAPIError(f"Erro ao baixar áudio: {response.status}")
-                    
-                    async with aiofiles.open(output_path, 'wb') as f:
-                        async for chunk in response.content.iter_chunked(8192):
-                            await f.write(chunk)
+            session = http_pool.get("evolution")
+            async with session.get(audio_url, headers={"apikey": self.api_key}, timeout=self.timeout) as response:
+                
+                if response.status != 200:
+                    raise EvolutionAPIError(f"Erro ao baixar áudio: {response.status}")
+                
+                async with aiofiles.open(output_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(8192):
+                        await f.write(chunk)
+                
+                logger.info(f"✅ Áudio baixado: {output_path}")
+                return str(output_path)
                     
-                    logger.info(f"✅ Áudio baixado: {output_path}")
-                    return str(output_path)
+        except Exception as e:
+            logger.error(f"❌ Erro ao baixar áudio: {str(e)}")
+            raise EvolutionAPIError(f"Erro no download: {str(e)}")
+    
+    @observe_service_call("evolution", "download_media")
+    async def download_audio_buffer(self, audio_url: str, phone_number: str) -> BinaryIO:
+        """Baixa o áudio do WhatsApp para um buffer em memória (vai para disco só se for grande).
+
+        Passa pelo circuit breaker dos downloads: com a Evolution travada, falha na hora em vez de esperar o timeout.
+        """
+        return await self.download_upstream.call(lambda: self._download_to_buffer(audio_url, phone_number))
+    
+    async def _download_to_buffer(self, audio_url: str, phone_number: str) -> BinaryIO:
+        max_bytes = settings.MAX_AUDIO_SIZE_MB * 1024 * 1024
+        buffer = new_audio_buffer(settings.AUDIO_SPOOL_MAX_BYTES)
+        
+        try:
+            logger.info(f"⬇️ Baixando áudio de: {phone_number}")
+            
+            session = http_pool.get("evolution")
+            async with session.get(audio_url, headers={"apikey": self.api_key}, timeout=self.timeout) as response:
+                
+                if response.status != 200:
+                    raise EvolutionAPIError(f"Erro ao baixar áudio: {response.status}", status=response.status)
+                
+                size = 0
+                async for chunk in response.content.iter_chunked(8192):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise EvolutionAPIError(f"Áudio excede {settings.MAX_AUDIO_SIZE_MB}MB", retryable=False)
+                    buffer.write(chunk)
+                
+                buffer.seek(0)
+                logger.info(f"✅ Áudio baixado em memória: {size} bytes")
+                return buffer
+        
+        except EvolutionAPIError as e:
+            buffer.close()
+            logger.error(f"❌ Erro ao baixar áudio: {str(e)}")
+            raise
                     
         except Exception as e:
+            buffer.close()
             logger.error(f"❌ Erro ao baixar áudio: {str(e)}")
             raise EvolutionAPIError(f"Erro no download: {str(e)}")
     
+    @observe_service_call("evolution", "instance_status")
     async def get_instance_status(self) -> Dict[str, Any]:
         """Verifica status da instância do WhatsApp"""
         
         try:
             url = f"{self.base_url}/instance/fetchInstances"
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                async with session.get(url, headers=self.headers) as response:
-                    
-                    if response.status != 200:
-                        raise EvolutionAPIError(f"Erro ao verificar status: {response.status}")
-                    
-                    result = await response.json()
-                    return result
+            session = http_pool.get("evolution")
+            async with session.get(url, headers=self.headers, timeout=self.timeout) as response:
+                
+                if response.status != 200:
+                    raise EvolutionAPIError(f"Erro ao verificar status: {response.status}")
+                
+                result = await response.json()
+                return result
                     
         except Exception as e:
             logger.error(f"❌ Erro ao verificar status: {str(e)}")
             raise EvolutionAPIError(f"Erro de status: {str(e)}")
+    
+    async def health_check(self) -> bool:
+        """Verifica se a Evolution API está respondendo"""
+        try:
+            await self.get_instance_status()
+            return True
+        except:
+            return False
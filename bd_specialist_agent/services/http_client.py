@@ -0,0 +1,100 @@
+# services/http_client.py
+import logging
+from typing import Any, Dict
+
+import aiohttp
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class HTTPSessionPool:
+    """Sessões aiohttp de longa duração, uma por upstream, com pool de conexões keep-alive"""
+
+    UPSTREAMS = ("evolution", "stt", "tts")
+
+    def __init__(self):
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def start(self):
+        """Cria as sessões de todos os upstreams (chamado no lifespan da aplicação)"""
+        for name in self.UPSTREAMS:
+            self.get(name)
+        logger.info(
+            f"🌐 Pool HTTP iniciado: {len(self._sessions)} sessões, "
+            f"{settings.HTTP_POOL_LIMIT_PER_HOST} conexões/host"
+        )
+
+    def get(self, name: str) -> aiohttp.ClientSession:
+        """Retorna a sessão do upstream, criando-a se ainda não existir ou tiver sido fechada"""
+        session = self._sessions.get(name)
+        if session is None or session.closed:
+            session = self._sessions[name] = self._create_session(name)
+        return session
+
+    async def close(self):
+        """Fecha todas as sessões e seus pools de conexões"""
+        for name, session in self._sessions.items():
+            try:
+                await session.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao fechar sessão HTTP {name}: {e}")
+        self._sessions.clear()
+        logger.info("🌐 Pool HTTP encerrado")
+
+    def _create_session(self, name: str) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+        )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config(name)])
+
+    def _trace_config(self, name: str) -> aiohttp.TraceConfig:
+        """Contadores de requisições, conexões e DNS alimentados pelos hooks de trace do aiohttp"""
+        stats = self._stats.setdefault(name, {
+            "requests": 0,
+            "in_flight": 0,
+            "errors": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        })
+
+        def _count(*fields: str, delta: int = 1):
+            async def _callback(session, context, params):
+                for field in fields:
+                    stats[field] += delta
+            return _callback
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(_count("requests", "in_flight"))
+        trace_config.on_request_end.append(_count("in_flight", delta=-1))
+        trace_config.on_request_exception.append(_count("in_flight", delta=-1))
+        trace_config.on_request_exception.append(_count("errors"))
+        trace_config.on_connection_create_end.append(_count("connections_created"))
+        trace_config.on_connection_reuseconn.append(_count("connections_reused"))
+        trace_config.on_dns_cache_hit.append(_count("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(_count("dns_cache_misses"))
+        return trace_config
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas por upstream: limites do pool e contadores de uso"""
+        result = {}
+        for name, stats in self._stats.items():
+            session = self._sessions.get(name)
+            connector = session.connector if session is not None else None
+            result[name] = {
+                "open": bool(session is not None and not session.closed),
+                "limit": connector.limit if connector else None,
+                "limit_per_host": connector.limit_per_host if connector else None,
+                "keepalive_timeout": settings.HTTP_KEEPALIVE_TIMEOUT,
+                **stats,
+            }
+        return result
+
+http_pool = HTTPSessionPool()
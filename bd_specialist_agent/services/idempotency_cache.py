@@ -0,0 +1,116 @@
+# services/idempotency_cache.py
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+class IdempotencyCache:
+    """Índice TTL+LRU de mensagens já recebidas, para descartar reentregas da Evolution API.
+
+    Opcionalmente persiste as chaves em um arquivo SQLite local, recarregado na
+    inicialização, para que reentregas logo após um restart também sejam ignoradas.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        db_path: Optional[str] = None
+    ):
+        self.ttl_seconds = ttl_seconds or settings.IDEMPOTENCY_TTL_SECONDS
+        self.db_path = db_path if db_path is not None else settings.IDEMPOTENCY_DB_PATH
+        self._cache = LRUCache(max_entries or settings.IDEMPOTENCY_MAX_ENTRIES, self.ttl_seconds)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def open(self):
+        """Abre o arquivo SQLite (se configurado) e carrega as chaves ainda válidas"""
+        if not self.db_path:
+            return
+
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # WAL with synchronous=NORMAL: commits append to the log without an fsync per webhook
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS processed_messages ("
+                "message_id TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+            )
+            self._purge_expired()
+
+            rows = self._conn.execute(
+                "SELECT message_id, seen_at FROM processed_messages ORDER BY seen_at DESC LIMIT ?",
+                (self._cache.max_entries,)
+            ).fetchall()
+            for message_id, seen_at in reversed(rows):
+                self._cache.set(message_id, True, stored_at=seen_at)
+
+            logger.info(f"🗂️ Índice de idempotência carregado: {len(rows)} mensagens ({self.db_path})")
+
+        except sqlite3.Error as e:
+            logger.error(f"❌ Erro ao abrir índice de idempotência {self.db_path}: {str(e)}")
+            self._conn = None
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def check_and_mark(self, message_id: str) -> bool:
+        """Retorna True se a mensagem já foi vista; caso contrário, registra e retorna False"""
+        if self._cache.get(message_id) is not None:
+            return True
+
+        now = time.time()
+        self._cache.set(message_id, True, stored_at=now)
+        self._persist(message_id, now)
+        return False
+
+    def forget(self, message_id: str):
+        """Remove uma mensagem do índice (ex.: job recusado, para aceitar a reentrega)"""
+        self._cache.pop(message_id)
+
+        if self._conn is not None:
+            try:
+                self._conn.execute("DELETE FROM processed_messages WHERE message_id = ?", (message_id,))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Falha ao remover {message_id} do índice de idempotência: {e}")
+
+    def _persist(self, message_id: str, seen_at: float):
+        if self._conn is None:
+            return
+
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO processed_messages (message_id, seen_at) VALUES (?, ?)",
+                (message_id, seen_at)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge_expired()
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Falha ao persistir {message_id} no índice de idempotência: {e}")
+
+    def _purge_expired(self):
+        self._conn.execute(
+            "DELETE FROM processed_messages WHERE seen_at < ?",
+            (time.time() - self.ttl_seconds,)
+        )
+        self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._cache.get_stats()
+        stats["persistent"] = self._conn is not None
+        return stats
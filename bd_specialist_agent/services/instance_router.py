@@ -0,0 +1,101 @@
+# services/instance_router.py
+import bisect
+import hashlib
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from services.evolution_outbox import outbox_for
+from services.resilience import ResilientUpstream, upstream
+
+logger = logging.getLogger(__name__)
+
+def configured_instances() -> List[str]:
+    """Instâncias da Evolution configuradas (EVOLUTION_INSTANCES, ou só EVOLUTION_INSTANCE)"""
+    instances = [instance.strip() for instance in settings.EVOLUTION_INSTANCES.split(",") if instance.strip()]
+    return list(dict.fromkeys(instances)) or [settings.EVOLUTION_INSTANCE]
+
+def instance_guard(instance: str) -> ResilientUpstream:
+    """Circuit breaker próprio de cada instância: uma instância fora do ar não afeta as outras"""
+    return upstream(f"evolution:{instance}")
+
+class InstanceRouter:
+    """Distribui as conversas entre as instâncias da Evolution por hashing consistente do número.
+
+    Cada número tem uma instância dona no anel; enquanto o circuito dela estiver aberto,
+    a conversa usa a próxima instância disponível do anel e volta para a dona quando ela
+    se recupera. Incluir ou remover instâncias só move as conversas das instâncias afetadas.
+    """
+
+    # Virtual nodes per instance: smooths the share of numbers each instance gets
+    VIRTUAL_NODES = 64
+
+    def __init__(self, instances: Optional[List[str]] = None):
+        self.instances = instances or configured_instances()
+
+        ring = sorted(
+            (self._hash(f"{instance}#{node}"), instance)
+            for instance in self.instances
+            for node in range(self.VIRTUAL_NODES)
+        )
+        self._ring_keys = [key for key, _ in ring]
+        self._ring_instances = [instance for _, instance in ring]
+
+        self.routed: Counter = Counter()
+        self.failovers = 0
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+    def owners(self, phone_number: str) -> List[str]:
+        """Todas as instâncias na ordem do anel a partir do número (a primeira é a dona)"""
+        start = bisect.bisect(self._ring_keys, self._hash(phone_number))
+        ordered: List[str] = []
+        for offset in range(len(self._ring_instances)):
+            instance = self._ring_instances[(start + offset) % len(self._ring_instances)]
+            if instance not in ordered:
+                ordered.append(instance)
+                if len(ordered) == len(self.instances):
+                    break
+        return ordered
+
+    def route(self, phone_number: str) -> List[str]:
+        """Instâncias a tentar para o número: as disponíveis na ordem do anel e, por último, as fora do ar"""
+        owners = self.owners(phone_number)
+        available = [instance for instance in owners if instance_guard(instance).breaker.available]
+        return available + [instance for instance in owners if instance not in available]
+
+    def record(self, phone_number: str, instance: str, failover: bool = False):
+        """Registra a instância que entregou o envio"""
+        self.routed[instance] += 1
+        if failover:
+            self.failovers += 1
+            logger.warning(f"🔀 Conversa {phone_number} atendida pela instância {instance} (failover)")
+
+    @property
+    def circuit_state(self) -> str:
+        """closed se todas as instâncias estão de pé, open se nenhuma, degraded no meio-termo"""
+        states = {instance_guard(instance).breaker.available for instance in self.instances}
+        if states == {True}:
+            return "closed"
+        return "open" if states == {False} else "degraded"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "instances": {
+                instance: {
+                    "available": instance_guard(instance).breaker.available,
+                    "circuit": instance_guard(instance).breaker.get_stats(),
+                    "outbox": outbox_for(instance).get_stats(),
+                    "routed": self.routed[instance],
+                }
+                for instance in self.instances
+            },
+            "circuit_state": self.circuit_state,
+            "failovers": self.failovers,
+            "virtual_nodes": self.VIRTUAL_NODES,
+        }
+
+instance_router = InstanceRouter()
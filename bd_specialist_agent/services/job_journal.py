@@ -0,0 +1,162 @@
+# services/job_journal.py
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class JobJournal:
+    """Journal (SQLite em modo WAL) com o resultado de cada etapa dos jobs de áudio.
+
+    Cada etapa concluída (transcrição, resposta do agente, arquivo TTS) é gravada
+    antes da próxima começar; após um restart, os jobs não finalizados são
+    retomados a partir da última etapa registrada. Sem JOB_JOURNAL_PATH, todas as
+    operações são no-op.
+    """
+
+    CHECKPOINT_FIELDS = ("transcript", "agent_response", "tts_artifact")
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        max_age_seconds: Optional[float] = None
+    ):
+        self.db_path = db_path if db_path is not None else settings.JOB_JOURNAL_PATH
+        self.max_attempts = max_attempts or settings.JOB_JOURNAL_MAX_ATTEMPTS
+        self.max_age_seconds = max_age_seconds or settings.JOB_JOURNAL_MAX_AGE_SECONDS
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def open(self):
+        """Abre o journal e remove registros finalizados há mais de um dia"""
+        if not self.db_path:
+            return
+
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS voice_jobs ("
+                "job_key TEXT PRIMARY KEY, "
+                "phone_number TEXT NOT NULL, "
+                "message_data TEXT NOT NULL, "
+                "stage TEXT NOT NULL, "
+                "status TEXT NOT NULL, "
+                "transcript TEXT, "
+                "agent_response TEXT, "
+                "tts_artifact TEXT, "
+                "error TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "DELETE FROM voice_jobs WHERE status != 'pending' AND updated_at < ?",
+                (time.time() - 86400,)
+            )
+            self._conn.commit()
+            logger.info(f"📒 Journal de jobs aberto: {self.db_path}")
+
+        except sqlite3.Error as e:
+            logger.error(f"❌ Erro ao abrir journal de jobs {self.db_path}: {str(e)}")
+            self._conn = None
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def begin(self, job_key: str, phone_number: str, message_data: Union[Dict[str, Any], List[Dict[str, Any]]]):
+        """Registra um job aceito (ignorado se já existir)"""
+        now = time.time()
+        self._execute(
+            "INSERT OR IGNORE INTO voice_jobs "
+            "(job_key, phone_number, message_data, stage, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'accepted', 'pending', ?, ?)",
+            (job_key, phone_number, json.dumps(message_data), now, now)
+        )
+
+    def checkpoint(self, job_key: str, stage: str, **fields: Any):
+        """Grava o resultado de uma etapa concluída"""
+        unknown = set(fields) - set(self.CHECKPOINT_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos de checkpoint inválidos: {unknown}")
+
+        assignments = "".join(f", {field} = ?" for field in fields)
+        self._execute(
+            f"UPDATE voice_jobs SET stage = ?, updated_at = ?{assignments} WHERE job_key = ?",
+            (stage, time.time(), *fields.values(), job_key)
+        )
+
+    def complete(self, job_key: str):
+        self._finish(job_key, "completed")
+
+    def fail(self, job_key: str, error: str):
+        self._finish(job_key, "failed", error)
+
+    def get(self, job_key: str) -> Optional[Dict[str, Any]]:
+        """Retorna o registro do job (com as etapas já concluídas) ou None"""
+        if self._conn is None:
+            return None
+
+        row = self._conn.execute("SELECT * FROM voice_jobs WHERE job_key = ?", (job_key,)).fetchone()
+        return dict(row) if row else None
+
+    def pending_jobs(self) -> List[Dict[str, Any]]:
+        """Retorna os jobs não finalizados para retomada, descartando os que excederam as tentativas
+        ou são antigos demais para uma resposta ainda fazer sentido"""
+        if self._conn is None:
+            return []
+
+        rows = self._conn.execute(
+            "SELECT * FROM voice_jobs WHERE status = 'pending' ORDER BY created_at"
+        ).fetchall()
+
+        expires_before = time.time() - self.max_age_seconds
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            if job["created_at"] < expires_before:
+                self.fail(job["job_key"], f"Expirado: aceito há mais de {self.max_age_seconds:.0f}s")
+                continue
+
+            if job["attempts"] >= self.max_attempts:
+                self.fail(job["job_key"], f"Excedeu {self.max_attempts} tentativas de retomada")
+                continue
+
+            self._execute(
+                "UPDATE voice_jobs SET attempts = attempts + 1 WHERE job_key = ?",
+                (job["job_key"],)
+            )
+            job["message_data"] = json.loads(job["message_data"])
+            jobs.append(job)
+
+        return jobs
+
+    def _finish(self, job_key: str, status: str, error: Optional[str] = None):
+        self._execute(
+            "UPDATE voice_jobs SET status = ?, error = ?, updated_at = ? WHERE job_key = ?",
+            (status, error, time.time(), job_key)
+        )
+
+    def _execute(self, query: str, params: tuple):
+        if self._conn is None:
+            return
+
+        try:
+            self._conn.execute(query, params)
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Falha ao gravar no journal de jobs: {e}")
@@ -0,0 +1,191 @@
+# services/job_queue.py
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.config import settings
+from services.lane_scheduler import LaneScheduler
+from utils.exceptions import JobQueueFullError
+
+logger = logging.getLogger(__name__)
+
+JobFactory = Callable[[], Awaitable[Any]]
+
+class JobQueue:
+    """Fila de jobs em memória (limitada) processada por um pool de workers asyncio.
+
+    Jobs com a mesma `lane_key` (ex.: telefone do cliente) executam em ordem FIFO,
+    um por vez; lanes diferentes rodam em paralelo até o número de workers.
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        job_timeout: Optional[float] = None,
+        history_size: Optional[int] = None
+    ):
+        self.max_size = max_size or settings.JOB_QUEUE_MAX_SIZE
+        self.worker_count = workers or settings.JOB_QUEUE_WORKERS
+        self.job_timeout = job_timeout or settings.JOB_TIMEOUT_SECONDS
+
+        self._scheduler: Optional[LaneScheduler] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, Dict[str, Any]] = {}
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=history_size or settings.JOB_HISTORY_SIZE)
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """Cria a fila e inicia os workers"""
+        if self.is_running:
+            return
+
+        self._scheduler = LaneScheduler(max_pending=self.max_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info(f"🧵 Fila de jobs iniciada: {self.worker_count} workers, capacidade {self.max_size}")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Aguarda a fila esvaziar (até drain_timeout) e encerra os workers"""
+        if not self.is_running:
+            return
+
+        try:
+            await asyncio.wait_for(self._scheduler.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Encerrando fila com {self._scheduler.pending} jobs pendentes")
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("🧵 Fila de jobs encerrada")
+
+    def submit(
+        self,
+        name: str,
+        factory: JobFactory,
+        lane_key: Optional[str] = None,
+        on_timeout: Optional[Callable[[], Any]] = None,
+        **metadata: Any
+    ) -> str:
+        """Enfileira um job sem bloquear; levanta JobQueueFullError se a fila estiver cheia.
+
+        Sem `lane_key` o job recebe uma lane própria e não tem ordenação com os demais.
+        `on_timeout` é chamado quando o job é cancelado por exceder JOB_TIMEOUT_SECONDS.
+        """
+        if not self.is_running:
+            raise JobQueueFullError("Fila de jobs não iniciada")
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "name": name,
+            "lane": lane_key or job_id,
+            "metadata": metadata,
+            "status": "queued",
+            "enqueued_at": time.time(),
+            "factory": factory,
+            "on_timeout": on_timeout,
+        }
+
+        try:
+            self._scheduler.push(job["lane"], job)
+        except JobQueueFullError:
+            self.rejected += 1
+            raise
+
+        self.submitted += 1
+        logger.debug(f"📥 Job enfileirado: {name} ({job['id']})")
+        return job["id"]
+
+    async def _worker(self, worker_id: int):
+        """Loop de um worker: consome e executa o próximo job de uma lane pronta"""
+        while True:
+            lane_key, job = await self._scheduler.pop()
+            try:
+                await self._run_job(job, worker_id)
+            finally:
+                self._scheduler.release(lane_key)
+
+    async def _run_job(self, job: Dict[str, Any], worker_id: int):
+        """Executa um job registrando tempos de espera e execução"""
+        factory = job.pop("factory")
+        on_timeout = job.pop("on_timeout")
+        job["status"] = "running"
+        job["worker"] = worker_id
+        job["started_at"] = time.time()
+        self._running[job["id"]] = job
+
+        try:
+            await asyncio.wait_for(factory(), timeout=self.job_timeout)
+            job["status"] = "completed"
+            self.completed += 1
+        except asyncio.TimeoutError:
+            job["status"] = "timeout"
+            self.failed += 1
+            logger.error(f"❌ Job {job['name']} ({job['id']}) excedeu {self.job_timeout}s")
+            if on_timeout is not None:
+                try:
+                    on_timeout()
+                except Exception as e:
+                    logger.warning(f"⚠️ Falha no tratamento de timeout do job {job['id']}: {str(e)}")
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            self.failed += 1
+            logger.error(f"❌ Job {job['name']} ({job['id']}) falhou: {str(e)}")
+        finally:
+            job["finished_at"] = time.time()
+            job["wait_ms"] = round((job["started_at"] - job["enqueued_at"]) * 1000, 1)
+            job["run_ms"] = round((job["finished_at"] - job["started_at"]) * 1000, 1)
+            self._running.pop(job["id"], None)
+            self._history.append(job)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna profundidade da fila, workers e tempos dos jobs recentes"""
+        history = list(self._history)
+
+        def _avg(field: str) -> Optional[float]:
+            values = [job[field] for job in history]
+            return round(sum(values) / len(values), 1) if values else None
+
+        return {
+            "running": self.is_running,
+            "workers": self.worker_count,
+            "queue_depth": self._scheduler.pending if self._scheduler else 0,
+            "queue_max_size": self.max_size,
+            "in_flight": len(self._running),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": _avg("wait_ms"),
+            "avg_run_ms": _avg("run_ms"),
+            "lanes": self._scheduler.get_stats() if self._scheduler else {},
+            "active_jobs": [
+                {
+                    "id": job["id"],
+                    "name": job["name"],
+                    "lane": job["lane"],
+                    "worker": job["worker"],
+                    "metadata": job["metadata"],
+                    "running_ms": round((time.time() - job["started_at"]) * 1000, 1),
+                }
+                for job in self._running.values()
+            ],
+            "recent_jobs": list(reversed(history)),
+        }
@@ -0,0 +1,85 @@
+# services/lane_scheduler.py
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Set, Tuple
+
+from utils.exceptions import JobQueueFullError
+
+logger = logging.getLogger(__name__)
+
+class LaneScheduler:
+    """Agendador com uma fila FIFO (lane) por conversa e rodízio entre conversas.
+
+    Cada lane executa no máximo um job por vez, preservando a ordem das respostas
+    para o mesmo cliente; lanes diferentes são atendidas em paralelo pelos workers
+    que consomem `pop()`. Uma lane vazia e ociosa é descartada imediatamente, de
+    modo que a memória depende apenas dos jobs pendentes, não do número de clientes.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+
+        self._lanes: Dict[str, Deque[Any]] = {}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._active: Set[str] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self.pending = 0
+        self.peak_lanes = 0
+        self.evicted_lanes = 0
+
+    def push(self, key: str, job: Any):
+        """Adiciona um job ao final da lane; levanta JobQueueFullError se exceder o limite global"""
+        if self.pending >= self.max_pending:
+            raise JobQueueFullError(f"Fila de jobs cheia ({self.max_pending})")
+
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = deque()
+            self.peak_lanes = max(self.peak_lanes, len(self._lanes))
+
+        lane.append(job)
+        self.pending += 1
+        self._idle.clear()
+
+        # A lane entra na fila de prontas só se não estiver lá nem em execução
+        if len(lane) == 1 and key not in self._active:
+            self._ready.put_nowait(key)
+
+    async def pop(self) -> Tuple[str, Any]:
+        """Aguarda a próxima lane pronta e retorna (chave, job); a lane fica ativa até `release`"""
+        key = await self._ready.get()
+        job = self._lanes[key].popleft()
+        self.pending -= 1
+        self._active.add(key)
+        return key, job
+
+    def release(self, key: str):
+        """Marca o job da lane como concluído, reagendando ou descartando a lane"""
+        self._active.discard(key)
+        lane = self._lanes.get(key)
+
+        if lane:
+            # Volta para o fim da fila de prontas: rodízio justo entre conversas
+            self._ready.put_nowait(key)
+        else:
+            self._lanes.pop(key, None)
+            self.evicted_lanes += 1
+
+        if self.pending == 0 and not self._active:
+            self._idle.set()
+
+    async def join(self):
+        """Aguarda até não haver jobs pendentes nem em execução"""
+        await self._idle.wait()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "lanes": len(self._lanes),
+            "active_lanes": len(self._active),
+            "ready_lanes": self._ready.qsize(),
+            "peak_lanes": self.peak_lanes,
+            "evicted_lanes": self.evicted_lanes,
+        }
@@ -0,0 +1,237 @@
+# services/resilience.py
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.config import settings
+from utils.exceptions import CircuitOpenError, UpstreamError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Circuit breaker de um upstream.
+
+    Após `failure_threshold` falhas seguidas o circuito abre e as chamadas falham
+    na hora; passados `reset_seconds`, uma única chamada de teste (half-open)
+    decide se ele fecha de novo ou volta a abrir.
+    """
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, reset_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or settings.CIRCUIT_RESET_SECONDS
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Indica se uma chamada pode seguir; no half-open só passa uma chamada de teste por vez"""
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+            logger.info(f"🟡 Circuito {self.name} half-open: testando o serviço")
+
+        if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+            self._probing = self.state == HALF_OPEN
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info(f"🟢 Circuito {self.name} fechado: serviço respondendo")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self.opened += 1
+            logger.warning(
+                f"🔴 Circuito {self.name} aberto após {self.consecutive_failures} falhas; "
+                f"chamadas recusadas por {self.reset_seconds:.0f}s"
+            )
+
+    @property
+    def available(self) -> bool:
+        """Indica, sem alterar o estado, se o circuito aceitaria uma chamada agora"""
+        return self.state != OPEN or time.monotonic() - self._opened_at >= self.reset_seconds
+
+    def release(self):
+        """Libera a vaga de teste de uma chamada que terminou sem sucesso nem falha (ex.: cancelada)"""
+        self._probing = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at)), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_seconds,
+            "retry_in_seconds": retry_in,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+class ResilientUpstream:
+    """Camada de resiliência de um serviço externo: circuit breaker e, para chamadas
+    idempotentes, requisições hedged (uma cópia disparada se a primeira passar do
+    percentil HEDGE_PERCENTILE de latência; vale a que responder primeiro).
+    """
+
+    # Successful-call latencies kept for the hedge percentile
+    LATENCY_WINDOW = 200
+
+    def __init__(self, name: str, hedge_enabled: bool = False):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.hedge_enabled = hedge_enabled
+        self._latencies: deque = deque(maxlen=self.LATENCY_WINDOW)
+
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Latência no percentil configurado; None enquanto não houver amostras suficientes"""
+        if len(self._latencies) < settings.HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * settings.HEDGE_PERCENTILE / 100))
+        return ordered[index]
+
+    def _check(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Serviço {self.name} indisponível (circuito aberto)")
+
+    def _record(self, error: Optional[BaseException]):
+        """Registra o resultado no circuit breaker"""
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            self.breaker.release()
+        elif isinstance(error, UpstreamError) and not error.retryable:
+            # The service answered (e.g. 4xx): not a sign it is down
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    async def _race(self, start: Callable[[int], Awaitable[T]], hedge: bool) -> Tuple[int, T]:
+        """Executa `start(0)` e, se passar da latência de hedge, `start(1)`; retorna (índice, resultado) do primeiro sucesso"""
+        delay = self.hedge_delay() if hedge and self.hedge_enabled else None
+        tasks: List[asyncio.Task] = [asyncio.ensure_future(start(0))]
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.hedged += 1
+                    logger.info(f"🏁 {self.name}: sem resposta em {delay:.2f}s, disparando requisição hedged")
+                    tasks.append(asyncio.ensure_future(start(1)))
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.index):
+                    if task.exception() is None:
+                        index = tasks.index(task)
+                        if index:
+                            self.hedge_wins += 1
+                        return index, task.result()
+                    error = error or task.exception()
+            raise error
+
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+
+    async def call(self, attempt: Callable[[], Awaitable[T]], hedge: bool = False) -> T:
+        """Executa uma chamada ao serviço pelo circuit breaker (com hedge se `hedge` e a chamada for idempotente)"""
+        self._check()
+        started = time.perf_counter()
+        try:
+            _, result = await self._race(lambda index: attempt(), hedge)
+        except BaseException as e:
+            self._record(e)
+            raise
+        self._latencies.append(time.perf_counter() - started)
+        self._record(None)
+        return result
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[bytes]], hedge: bool = False) -> AsyncIterator[bytes]:
+        """Como `call`, para respostas em streaming: o hedge disputa o primeiro bloco e o
+        restante vem só do stream vencedor"""
+        self._check()
+        started = time.perf_counter()
+        streams: Dict[int, AsyncIterator[bytes]] = {}
+
+        async def first_chunk(index: int) -> bytes:
+            streams[index] = open_stream()
+            return await streams[index].__anext__()
+
+        try:
+            try:
+                winner, chunk = await self._race(first_chunk, hedge)
+            except StopAsyncIteration:
+                self._record(None)
+                return
+            # Time to first chunk is the latency hedging cares about
+            self._latencies.append(time.perf_counter() - started)
+
+            yield chunk
+            async for chunk in streams[winner]:
+                yield chunk
+        except BaseException as e:
+            self._record(e)
+            raise
+        else:
+            self._record(None)
+        finally:
+            for stream in streams.values():
+                await stream.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.get_stats(),
+            "hedge_enabled": self.hedge_enabled,
+            "hedge_delay_seconds": round(self.hedge_delay(), 3) if self.hedge_delay() is not None else None,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+# One resilience layer per upstream, shared by every client instance
+_upstreams: Dict[str, ResilientUpstream] = {
+    "stt": ResilientUpstream("stt", hedge_enabled=settings.STT_HEDGE_ENABLED),
+    "tts": ResilientUpstream("tts", hedge_enabled=settings.TTS_HEDGE_ENABLED),
+}
+
+def upstream(name: str) -> ResilientUpstream:
+    """Retorna a camada do upstream; outras (ex.: evolution:<instância>) são criadas no primeiro uso, sem hedge"""
+    guard = _upstreams.get(name)
+    if guard is None:
+        guard = _upstreams[name] = ResilientUpstream(name)
+    return guard
+
+def get_resilience_stats() -> Dict[str, Any]:
+    return {name: guard.get_stats() for name, guard in _upstreams.items()}
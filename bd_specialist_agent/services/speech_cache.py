@@ -0,0 +1,77 @@
+# services/speech_cache.py
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from utils.cache import DiskCache, LRUCache
+
+logger = logging.getLogger(__name__)
+
+class SpeechCache:
+    """Cache de áudio sintetizado endereçado por (texto, voz, velocidade).
+
+    Camada em memória (LRU) na frente de uma camada opcional em disco; áudios
+    maiores que TTS_CACHE_MAX_ITEM_KB não são armazenados.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        disk_dir: Optional[str] = None,
+        disk_max_mb: Optional[int] = None,
+        max_item_kb: Optional[int] = None
+    ):
+        self.memory = LRUCache(max_entries or settings.TTS_CACHE_MAX_ENTRIES)
+        self.max_item_bytes = (max_item_kb or settings.TTS_CACHE_MAX_ITEM_KB) * 1024
+
+        disk_dir = disk_dir if disk_dir is not None else settings.TTS_CACHE_DIR
+        disk_max_bytes = (disk_max_mb or settings.TTS_CACHE_DISK_MAX_MB) * 1024 * 1024
+        self.disk = DiskCache(disk_dir, disk_max_bytes) if disk_dir else None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, voice: str, speed: float) -> str:
+        return hashlib.sha256(f"{voice}|{speed}|{text.strip()}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory_hits += 1
+            return audio
+
+        if self.disk is not None:
+            audio = self.disk.get(key)
+            if audio is not None:
+                self.memory.set(key, audio)
+                self.disk_hits += 1
+                return audio
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, audio: bytes):
+        if not audio or len(audio) > self.max_item_bytes:
+            return
+
+        self.memory.set(key, audio)
+        if self.disk is not None:
+            self.disk.set(key, audio)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "max_item_bytes": self.max_item_bytes,
+            "memory": self.memory.get_stats(),
+            "disk": self.disk.get_stats() if self.disk is not None else None,
+        }
+
+speech_cache = SpeechCache()
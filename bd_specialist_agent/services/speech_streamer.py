@@ -0,0 +1,117 @@
+# services/speech_streamer.py
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from app.config import settings
+from utils.audio_buffer import concat_wav, iter_bytes
+from utils.metrics import TIME_TO_FIRST_AUDIO_SECONDS
+from utils.speech_text import iter_sentences
+
+logger = logging.getLogger(__name__)
+
+class SpeechReplyStreamer:
+    """Entrega a resposta do agente em voz frase a frase, enquanto o agente ainda escreve.
+
+    Cada frase concluída vai para o TTS na hora (até TTS_SEGMENT_CONCURRENCY em paralelo);
+    os áudios são enviados na ordem do texto, e frases que ficam prontas enquanto a
+    anterior é enviada seguem juntas na próxima nota de voz.
+    """
+
+    def __init__(self, tts_service, evolution_service, voice_encoder):
+        self.tts_service = tts_service
+        self.evolution_service = evolution_service
+        self.voice_encoder = voice_encoder
+        self._slots = asyncio.Semaphore(settings.TTS_SEGMENT_CONCURRENCY)
+
+    async def _synthesize(self, sentence: str) -> bytes:
+        async with self._slots:
+            return await self.tts_service.synthesize_bytes(sentence)
+
+    async def deliver(
+        self,
+        phone_number: str,
+        text_chunks: AsyncIterator[str],
+        started_at: Optional[float] = None
+    ) -> str:
+        """Sintetiza e envia o texto recebido em pedaços; retorna a resposta completa do agente"""
+
+        sentences: List[str] = []
+        pending: asyncio.Queue = asyncio.Queue()
+
+        async def produce():
+            try:
+                async for sentence in iter_sentences(text_chunks, settings.TTS_SEGMENT_MIN_CHARS):
+                    sentences.append(sentence)
+                    pending.put_nowait(asyncio.create_task(self._synthesize(sentence)))
+            finally:
+                pending.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        tasks: List[asyncio.Task] = []
+        voice_notes = 0
+
+        # A follow-up taken from the queue that was still synthesizing heads the next note
+        carry = None
+
+        try:
+            while True:
+                task, carry = (carry, None) if carry is not None else (await pending.get(), None)
+                if task is None:
+                    break
+                if task not in tasks:
+                    tasks.append(task)
+                audio_segments = [await task]
+
+                # Sentences already synthesized ride along in the same voice note; unfinished ones wait
+                finished = False
+                while not pending.empty():
+                    follow_up = pending.get_nowait()
+                    if follow_up is None:
+                        finished = True
+                        break
+                    tasks.append(follow_up)
+                    if not follow_up.done():
+                        carry = follow_up
+                        break
+                    audio_segments.append(follow_up.result())
+
+                audio = audio_segments[0] if len(audio_segments) == 1 else concat_wav(
+                    audio_segments, settings.TTS_SEGMENT_PAUSE_MS
+                )
+                await self._send(phone_number, audio, voice_notes)
+                voice_notes += 1
+
+                if voice_notes == 1 and started_at is not None:
+                    TIME_TO_FIRST_AUDIO_SECONDS.labels(mode="sentence").observe(time.perf_counter() - started_at)
+                if finished:
+                    break
+
+            # Surfaces agent errors raised while streaming
+            await producer
+
+        finally:
+            producer.cancel()
+            for task in tasks:
+                task.cancel()
+            while not pending.empty():
+                task = pending.get_nowait()
+                if task is not None:
+                    task.cancel()
+
+        logger.info(f"🔊📤 Resposta em voz entregue em {voice_notes} partes ({len(sentences)} frases)")
+        return " ".join(sentences)
+
+    async def _send(self, phone_number: str, audio: bytes, part: int):
+        voice_note, content_type = await self.voice_encoder.encode(audio)
+        output_filename = self.voice_encoder.filename(
+            f"response_{phone_number}_{int(datetime.utcnow().timestamp())}_{part}", content_type
+        )
+        await self.evolution_service.send_audio_stream(
+            phone_number,
+            iter_bytes(voice_note),
+            filename=output_filename,
+            content_type=content_type
+        )
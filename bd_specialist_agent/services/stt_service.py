@@ -1,12 +1,24 @@
 # services/stt_service.py
+import asyncio
+import hashlib
 import logging
+import re
+import wave
 import aiofiles
 import aiohttp
-from typing import Optional
+import numpy as np
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, List, Optional, Union
 from pathlib import Path
 
 from app.config import settings
-from utils.exceptions import STTError
+from services.audio_processor import AudioProcessor
+from services.http_client import http_pool
+from services.resilience import upstream
+from services.transcription_cache import transcription_cache
+from utils.audio_buffer import encode_wav, hash_buffer, iter_buffer
+from utils.audio_headers import read_duration
+from utils.exceptions import AudioProcessingError, STTError
+from utils.metrics import observe_service_call
 
 logger = logging.getLogger(__name__)
 
@@ -16,50 +28,220 @@ class STTService:
     def __init__(self):
         self.base_url = settings.STT_SERVICE_URL
         self.timeout = aiohttp.ClientTimeout(total=60)  # 1 minuto para transcrição
+        self.model = settings.STT_MODEL
+        self.language = settings.STT_LANGUAGE
+        self.cache = transcription_cache if settings.STT_CACHE_ENABLED else None
+        self._chunk_semaphore = asyncio.Semaphore(settings.STT_CHUNK_CONCURRENCY)
+        self.upstream = upstream("stt")
         
+    @property
+    def circuit_state(self) -> str:
+        return self.upstream.breaker.state
+    
     async def transcribe_audio(self, audio_file_path: str) -> str:
         """Transcreve áudio para texto usando Whisper-Fast API"""
         
         if not Path(audio_file_path).exists():
             raise STTError(f"Arquivo de áudio não encontrado: {audio_file_path}")
         
+        logger.info(f"🎤 Iniciando transcrição: {audio_file_path}")
+        
+        async with aiofiles.open(audio_file_path, 'rb') as f:
+            audio_content = await f.read()
+        
+        return await self._transcribe_cached(
+            hashlib.sha256(audio_content).hexdigest(),
+            lambda: self._transcribe(audio_content, Path(audio_file_path).name, 'audio/mpeg')
+        )
+    
+    async def transcribe_buffer(
+        self,
+        audio_buffer: BinaryIO,
+        filename: str = "audio.ogg",
+        content_type: str = "audio/ogg",
+        audio_digest: Optional[str] = None
+    ) -> str:
+        """Transcreve áudio a partir de um buffer (memória/spooled), enviando-o em streaming.
+
+        `audio_digest` é a chave do cache (ex.: hash do áudio recebido, antes do VAD); por padrão, o hash do buffer.
+        """
+        
+        logger.info(f"🎤 Iniciando transcrição do buffer: {filename}")
+        
+        return await self._transcribe_cached(
+            audio_digest or hash_buffer(audio_buffer),
+            lambda: self._transcribe_buffer(audio_buffer, filename, content_type)
+        )
+    
+    async def _transcribe_buffer(self, audio_buffer: BinaryIO, filename: str, content_type: str) -> str:
+        # Long clips (WAV after VAD, or OGG/Opus notes as received) are split and transcribed in parallel
+        if settings.STT_CHUNK_ENABLED:
+            pcm = await self._long_audio_pcm(audio_buffer, content_type)
+            if pcm is not None:
+                return await self._transcribe_chunked(*pcm)
+        
+        return await self._transcribe(self._upload_body(audio_buffer), filename, content_type)
+    
+    def _upload_body(self, audio_buffer: BinaryIO) -> Union[bytes, AsyncIterator[bytes]]:
+        """Streaming do buffer; com hedge o corpo precisa ser reenviável, então vai em bytes"""
+        if self.upstream.hedge_enabled:
+            audio_buffer.seek(0)
+            return audio_buffer.read()
+        return iter_buffer(audio_buffer)
+    
+    async def _transcribe_cached(self, audio_digest: str, transcribe: Callable[[], Awaitable[str]]) -> str:
+        """Consulta o cache pelo hash do áudio antes de chamar a API de transcrição"""
+        
+        if self.cache is None:
+            return await transcribe()
+        
+        cached_text = self.get_cached_transcription(audio_digest)
+        if cached_text is not None:
+            logger.info(f"♻️ Transcrição encontrada em cache: {len(cached_text)} caracteres")
+            return cached_text
+        
+        transcription = await transcribe()
+        self.cache.set(self.cache.make_key(audio_digest, self.language, self.model), transcription)
+        return transcription
+    
+    def get_cached_transcription(self, audio_digest: str) -> Optional[str]:
+        """Transcrição já em cache para o hash do áudio, sem decodificar nem chamar a API"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache.make_key(audio_digest, self.language, self.model))
+    
+    async def _long_audio_pcm(self, audio_buffer: BinaryIO, content_type: str) -> Optional[tuple]:
+        """(amostras, taxa) de um áudio mais longo que STT_CHUNK_MAX_SECONDS; None se ele cabe numa requisição"""
+        if content_type == "audio/wav":
+            pcm = self._read_wav_pcm(audio_buffer)
+        else:
+            # Header duration avoids decoding the many short notes; unknown durations are decoded
+            duration = read_duration(audio_buffer)
+            if duration is not None and duration <= settings.STT_CHUNK_MAX_SECONDS:
+                return None
+            try:
+                pcm = await AudioProcessor.decode_pcm(audio_buffer, settings.VAD_SAMPLE_RATE), settings.VAD_SAMPLE_RATE
+            except AudioProcessingError as e:
+                logger.warning(f"⚠️ Não foi possível decodificar o áudio para dividir, transcrevendo inteiro: {str(e)}")
+                return None
+        
+        if pcm is None or len(pcm[0]) / pcm[1] <= settings.STT_CHUNK_MAX_SECONDS:
+            return None
+        return pcm
+    
+    @staticmethod
+    def _read_wav_pcm(audio_buffer: BinaryIO) -> Optional[tuple]:
+        """Lê (amostras, taxa) de um WAV PCM 16 bits mono; None para outros formatos"""
         try:
-            logger.info(f"🎤 Iniciando transcrição: {audio_file_path}")
+            audio_buffer.seek(0)
+            with wave.open(audio_buffer, "rb") as wav_file:
+                if wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2:
+                    return None
+                sample_rate = wav_file.getframerate()
+                samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+            return samples, sample_rate
+        except (wave.Error, EOFError):
+            return None
+        finally:
+            audio_buffer.seek(0)
+    
+    async def _transcribe_chunked(self, samples: np.ndarray, sample_rate: int) -> str:
+        """Divide o áudio nos silêncios, transcreve os segmentos em paralelo e junta o texto em ordem"""
+        
+        cuts = AudioProcessor.split_at_silence(
+            samples,
+            sample_rate,
+            settings.STT_CHUNK_MAX_SECONDS,
+            settings.STT_CHUNK_SEARCH_SECONDS
+        )
+        
+        # Each segment after the first starts a little before its cut so no word is lost at the seam
+        overlap = int(settings.STT_CHUNK_OVERLAP_SECONDS * sample_rate)
+        segments = [
+            (max(0, start - overlap) if start else 0, end)
+            for start, end in zip([0, *cuts], [*cuts, len(samples)])
+        ]
+        logger.info(
+            f"✂️ Áudio de {len(samples) / sample_rate:.0f}s dividido em {len(segments)} segmentos "
+            "para transcrição paralela"
+        )
+        
+        async def transcribe_segment(index: int, start: int, end: int) -> str:
+            async with self._chunk_semaphore:
+                return await self._transcribe(
+                    encode_wav(samples[start:end].tobytes(), sample_rate),
+                    f"segment_{index}.wav",
+                    "audio/wav",
+                    allow_empty=True
+                )
+        
+        parts = await asyncio.gather(
+            *(transcribe_segment(index, start, end) for index, (start, end) in enumerate(segments))
+        )
+        
+        transcription = _stitch_transcripts(parts)
+        if not transcription:
+            raise STTError("Transcrição retornou texto vazio")
+        return transcription
+    
+    async def _transcribe(
+        self,
+        audio: Union[bytes, AsyncIterator[bytes]],
+        filename: str,
+        content_type: str,
+        allow_empty: bool = False
+    ) -> str:
+        """Envia o áudio para a API Whisper-Fast (via circuit breaker) e retorna o texto transcrito"""
+        
+        # Only a payload in memory can be sent twice by a hedged request
+        transcription = await self.upstream.call(
+            lambda: self._post_transcription(audio, filename, content_type),
+            hedge=isinstance(audio, bytes)
+        )
+        
+        if not transcription and not allow_empty:
+            raise STTError("Transcrição retornou texto vazio", retryable=False)
+        
+        logger.info(f"✅ Transcrição concluída: {len(transcription)} caracteres")
+        return transcription
+    
+    @observe_service_call("stt", "transcribe")
+    async def _post_transcription(
+        self,
+        audio: Union[bytes, AsyncIterator[bytes]],
+        filename: str,
+        content_type: str
+    ) -> str:
+        try:
+            # Prepare form data for upload
+            data = aiohttp.FormData()
+            data.add_field('file', 
+                         audio,
+                         filename=filename,
+                         content_type=content_type)
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                # Prepare form data for upload
-                data = aiohttp.FormData()
-                
-                async with aiofiles.open(audio_file_path, 'rb') as f:
-                    audio_content = await f.read()
-                    data.add_field('file', 
-                                 audio_content,
-                                 filename=Path(audio_file_path).name,
-                                 content_type='audio/mpeg')
+            data.add_field('model', self.model)  # Required by OpenAI-compatible API
+            data.add_field('language', self.language)
+            
+            # Make request to Whisper-Fast API
+            session = http_pool.get("stt")
+            async with session.post(
+                f"{self.base_url}/audio/transcriptions",
+                data=data,
+                timeout=self.timeout
+            ) as response:
                 
-                data.add_field('model', 'whisper-1')  # Required by OpenAI-compatible API
-                data.add_field('language', 'pt')  # Portuguese
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise STTError(f"STT API error {response.status}: {error_text}", status=response.status)
                 
-                # Make request to Whisper-Fast API
-                async with session.post(
-                    f"{self.base_url}/audio/transcriptions",
-                    data=data
-                ) as response:
-                    
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise STTError(f"STT API error {response.status}: {error_text}")
-                    
-                    result = await response.json()
-                    transcription = result.get('text', '').strip()
-                    
-                    if not transcription:
-                        raise STTError("Transcrição retornou texto vazio")
-                    
-                    logger.info(f"✅ Transcrição concluída: {len(transcription)} caracteres")
-                    return transcription
+                result = await response.json()
+                return result.get('text', '').strip()
+        
+        except STTError:
+            raise
                     
-        except aiohttp.ClientError as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"❌ Erro de conexão STT: {str(e)}")
             raise STTError(f"Erro de conexão com serviço STT: {str(e)}")
         
@@ -70,8 +252,33 @@ class STTService:
     async def health_check(self) -> bool:
         """Verifica se o serviço STT está funcionando"""
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                async with session.get(f"{self.base_url}/health") as response:
-                    return response.status == 200
+            session = http_pool.get("stt")
+            async with session.get(f"{self.base_url}/health", timeout=aiohttp.ClientTimeout(total=10)) as response:
+                return response.status == 200
         except:
             return False
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w]", "", word.lower())
+
+def _stitch_transcripts(parts: List[str], max_overlap_words: int = 12) -> str:
+    """Junta as transcrições dos segmentos removendo as palavras repetidas na sobreposição"""
+    merged: List[str] = []
+    
+    for part in parts:
+        words = part.split()
+        if not words:
+            continue
+        
+        # Longest tail of the text so far that the segment repeats at its start
+        tail = [_normalize_word(word) for word in merged[-max_overlap_words:]]
+        head = [_normalize_word(word) for word in words[:max_overlap_words]]
+        repeated = 0
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == head[:size]:
+                repeated = size
+                break
+        
+        merged.extend(words[repeated:])
+    
+    return " ".join(merged)
@@ -0,0 +1,72 @@
+# services/transcription_cache.py
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from utils.cache import DiskCache, LRUCache
+
+logger = logging.getLogger(__name__)
+
+class TranscriptionCache:
+    """Cache de transcrições endereçado pelo hash do áudio (+ idioma e modelo).
+
+    Camada em memória (LRU) na frente de uma camada opcional em disco, limitada
+    por tamanho; um acerto no disco é promovido para a memória.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        disk_dir: Optional[str] = None,
+        disk_max_mb: Optional[int] = None
+    ):
+        self.memory = LRUCache(max_entries or settings.STT_CACHE_MAX_ENTRIES)
+
+        disk_dir = disk_dir if disk_dir is not None else settings.STT_CACHE_DIR
+        disk_max_bytes = (disk_max_mb or settings.STT_CACHE_DISK_MAX_MB) * 1024 * 1024
+        self.disk = DiskCache(disk_dir, disk_max_bytes) if disk_dir else None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(audio_digest: str, language: str, model: str) -> str:
+        return hashlib.sha256(f"{model}|{language}|{audio_digest}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        text = self.memory.get(key)
+        if text is not None:
+            self.memory_hits += 1
+            return text
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                text = value.decode("utf-8")
+                self.memory.set(key, text)
+                self.disk_hits += 1
+                return text
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, text: str):
+        self.memory.set(key, text)
+        if self.disk is not None:
+            self.disk.set(key, text.encode("utf-8"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "memory": self.memory.get_stats(),
+            "disk": self.disk.get_stats() if self.disk is not None else None,
+        }
+
+transcription_cache = TranscriptionCache()
@@ -1,12 +1,19 @@
 # services/tts_service.py
+import asyncio
 import logging
 import aiohttp
 import aiofiles
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 
 from app.config import settings
+from services.http_client import http_pool
+from services.resilience import upstream
+from services.speech_cache import speech_cache
+from utils.audio_buffer import concat_wav, iter_bytes
+from utils.speech_text import normalize_for_speech, split_sentences
 from utils.exceptions import TTSError
+from utils.metrics import track_service_call
 
 logger = logging.getLogger(__name__)
 
@@ -17,17 +24,47 @@ class TTSService:
         self.base_url = settings.TTS_SERVICE_URL
         self.default_voice = settings.DEFAULT_VOICE
         self.timeout = aiohttp.ClientTimeout(total=30)
+        self.cache = speech_cache if settings.TTS_CACHE_ENABLED else None
+        self._segment_slots = asyncio.Semaphore(settings.TTS_SEGMENT_CONCURRENCY)
+        self.upstream = upstream("tts")
         
-    async def synthesize_speech(self, text: str, output_filename: Optional[str] = None) -> str:
-        """Sintetiza texto em áudio usando Piper TTS"""
+    @property
+    def circuit_state(self) -> str:
+        return self.upstream.breaker.state
+    
+    def _prepare_text(self, text: str) -> str:
+        """Valida o texto e o reescreve na forma falada (números, SQL); limita se não houver segmentação"""
         
         if not text or len(text.strip()) == 0:
-            raise TTSError("Texto vazio fornecido para síntese")
+            raise TTSError("Texto vazio fornecido para síntese", retryable=False)
         
-        if len(text) > 5000:  # Limite de caracteres
+        text = normalize_for_speech(text)
+        
+        # Segmented synthesis sends at most TTS_SEGMENT_MAX_CHARS per request
+        if not settings.TTS_SEGMENT_ENABLED and len(text) > 5000:  # Limite de caracteres
             text = text[:4997] + "..."
             logger.warning("⚠️ Texto truncado para síntese TTS")
         
+        return text
+    
+    def _segments(self, text: str) -> List[str]:
+        if not settings.TTS_SEGMENT_ENABLED:
+            return [text]
+        return split_sentences(text, settings.TTS_SEGMENT_MAX_CHARS, settings.TTS_SEGMENT_MIN_CHARS) or [text]
+    
+    def _request_params(self, text: str) -> Dict[str, Any]:
+        return {
+            'text': text,
+            'voice': self.default_voice,
+            'speed': settings.TTS_SPEED
+        }
+    
+    def _cache_key(self, text: str) -> str:
+        return self.cache.make_key(text, self.default_voice, settings.TTS_SPEED)
+    
+    async def synthesize_speech(self, text: str, output_filename: Optional[str] = None) -> str:
+        """Sintetiza texto em áudio usando Piper TTS"""
+        
         # Define output path
         if not output_filename:
             import time
@@ -37,44 +74,152 @@ class TTSService:
         output_path.parent.mkdir(exist_ok=True)
         
         try:
-            logger.info(f"🔊 Iniciando síntese TTS: {len(text)} caracteres")
+            # Save audio content to file
+            async with aiofiles.open(output_path, 'wb') as f:
+                async for chunk in self.stream_speech(text):
+                    await f.write(chunk)
+            
+            logger.info(f"✅ Síntese TTS concluída: {output_path}")
+            return str(output_path)
+                    
+        except TTSError:
+            raise
+        
+        except Exception as e:
+            logger.error(f"❌ Erro inesperado na síntese: {str(e)}")
+            raise TTSError(f"Erro na síntese de voz: {str(e)}")
+    
+    async def synthesize_bytes(self, text: str) -> bytes:
+        """Sintetiza texto e retorna o áudio completo em memória"""
+        return b"".join([chunk async for chunk in self.stream_speech(text)])
+    
+    def get_cached_speech(self, text: str) -> Optional[bytes]:
+        """Retorna o áudio já sintetizado para o texto, sem chamar o Piper"""
+        if self.cache is None or not text or not text.strip():
+            return None
+        return self.cache.get(self._cache_key(self._prepare_text(text)))
+    
+    async def stream_speech(self, text: str) -> AsyncIterator[bytes]:
+        """Sintetiza texto e devolve o áudio em blocos, à medida que chegam do Piper (sem arquivo).
+
+        Textos com várias frases são sintetizados por segmento, em paralelo, e entregues
+        como um único WAV depois de juntos.
+        """
+        
+        text = self._prepare_text(text)
+        
+        cache_key = self._cache_key(text) if self.cache is not None else None
+        if cache_key is not None:
+            cached_audio = self.cache.get(cache_key)
+            if cached_audio is not None:
+                logger.info(f"♻️ Áudio TTS encontrado em cache: {len(cached_audio)} bytes")
+                async for chunk in iter_bytes(cached_audio):
+                    yield chunk
+                return
+        
+        segments = self._segments(text)
+        if len(segments) > 1:
+            audio = await self._synthesize_segments(segments)
+            if cache_key is not None:
+                self.cache.set(cache_key, audio)
+            async for chunk in iter_bytes(audio):
+                yield chunk
+            return
+        
+        if cache_key is None:
+            async for chunk in self._stream_from_piper(text):
+                yield chunk
+            return
+        
+        # Tee the stream into the cache while forwarding it, unless it outgrows an entry
+        chunks = []
+        size = 0
+        async for chunk in self._stream_from_piper(text):
+            if chunks is not None:
+                size += len(chunk)
+                if size <= self.cache.max_item_bytes:
+                    chunks.append(chunk)
+                else:
+                    chunks = None
+            yield chunk
+        
+        if chunks is not None:
+            self.cache.set(cache_key, b"".join(chunks))
+    
+    async def _synthesize_segments(self, segments: List[str]) -> bytes:
+        """Sintetiza os segmentos em paralelo (limitado) e junta o áudio na ordem original"""
+        
+        logger.info(f"🧩 Síntese TTS segmentada: {len(segments)} segmentos em paralelo")
+        
+        async def synthesize(segment: str) -> bytes:
+            async with self._segment_slots:
+                return b"".join([chunk async for chunk in self._stream_from_piper(segment)])
+        
+        audio_segments = await asyncio.gather(*(synthesize(segment) for segment in segments))
+        
+        try:
+            return concat_wav(list(audio_segments), settings.TTS_SEGMENT_PAUSE_MS)
+        except Exception as e:
+            raise TTSError(f"Erro ao juntar segmentos de áudio: {str(e)}")
+    
+    def _stream_from_piper(self, text: str) -> AsyncIterator[bytes]:
+        """Requisita a síntese ao Piper (via circuit breaker, com hedge) e repassa os blocos da resposta"""
+        return self.upstream.stream(lambda: self._request_piper(text), hedge=True)
+    
+    async def _request_piper(self, text: str) -> AsyncIterator[bytes]:
+        try:
+            logger.info(f"🔊 Iniciando síntese TTS em streaming: {len(text)} caracteres")
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
-                # Prepare request parameters
-                params = {
-                    'text': text,
-                    'voice': self.default_voice,
-                    'speed': settings.TTS_SPEED
-                }
-                
-                async with session.get(self.base_url, params=params) as response:
+            session = http_pool.get("tts")
+            with track_service_call("tts", "synthesize"):
+                async with session.get(self.base_url, params=self._request_params(text), timeout=self.timeout) as response:
                     
                     if response.status != 200:
                         error_text = await response.text()
-                        raise TTSError(f"TTS API error {response.status}: {error_text}")
+                        raise TTSError(f"TTS API error {response.status}: {error_text}", status=response.status)
                     
-                    # Save audio content to file
-                    async with aiofiles.open(output_path, 'wb') as f:
-                        async for chunk in response.content.iter_chunked(8192):
-                            await f.write(chunk)
+                    async for chunk in response.content.iter_chunked(8192):
+                        yield chunk
                     
-                    logger.info(f"✅ Síntese TTS concluída: {output_path}")
-                    return str(output_path)
+                    logger.info("✅ Síntese TTS em streaming concluída")
                     
-        except aiohttp.ClientError as e:
+        except TTSError:
+            raise
+        
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"❌ Erro de conexão TTS: {str(e)}")
             raise TTSError(f"Erro de conexão com serviço TTS: {str(e)}")
+    
+    async def prewarm(self, phrases: List[str]) -> int:
+        """Sintetiza antecipadamente frases fixas/frequentes para que sejam servidas do cache"""
         
-        except Exception as e:
-            logger.error(f"❌ Erro inesperado na síntese: {str(e)}")
-            raise TTSError(f"Erro na síntese de voz: {str(e)}")
+        if self.cache is None:
+            return 0
+        
+        warmed = 0
+        for phrase in phrases:
+            if self.get_cached_speech(phrase) is not None:
+                continue
+            try:
+                # One unsegmented Piper call per phrase, so a failure counts once in the breaker
+                text = self._prepare_text(phrase)
+                audio = b"".join([chunk async for chunk in self._stream_from_piper(text)])
+                self.cache.set(self._cache_key(text), audio)
+                warmed += 1
+            except Exception as e:
+                # Piper is likely down: more attempts would only open the circuit before real traffic
+                logger.warning(f"⚠️ Falha ao pré-sintetizar frase, pré-aquecimento interrompido: {str(e)}")
+                break
+        
+        logger.info(f"🔥 Cache TTS pré-aquecido: {warmed}/{len(phrases)} frases sintetizadas")
+        return warmed
     
     async def health_check(self) -> bool:
         """Verifica se o serviço TTS está funcionando"""
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                params = {'text': 'test', 'voice': self.default_voice}
-                async with session.get(f"{self.base_url}/health", params=params) as response:
-                    return response.status == 200
+            session = http_pool.get("tts")
+            params = {'text': 'test', 'voice': self.default_voice}
+            async with session.get(f"{self.base_url}/health", params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                return response.status == 200
         except:
             return False
@@ -0,0 +1,96 @@
+# services/voice_coalescer.py
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+FlushCallback = Callable[[str, List[Dict[str, Any]]], None]
+
+class VoiceCoalescer:
+    """Janela de agrupamento (debounce) de notas de voz por cliente.
+
+    Notas que chegam dentro da janela entram no mesmo lote; o lote é entregue ao
+    `on_flush` quando a janela expira sem novas notas, quando atinge o tamanho
+    máximo ou quando o primeiro áudio já esperou `max_wait` segundos.
+    """
+
+    def __init__(
+        self,
+        on_flush: FlushCallback,
+        window: Optional[float] = None,
+        max_wait: Optional[float] = None,
+        max_batch: Optional[int] = None
+    ):
+        self.on_flush = on_flush
+        self.window = window if window is not None else settings.VOICE_COALESCE_WINDOW_SECONDS
+        self.max_wait = max_wait or settings.VOICE_COALESCE_MAX_WAIT_SECONDS
+        self.max_batch = max_batch or settings.VOICE_COALESCE_MAX_BATCH
+
+        self._batches: Dict[str, Dict[str, Any]] = {}
+
+        self.batches_flushed = 0
+        self.notes_coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def has_batch(self, phone_number: str) -> bool:
+        return phone_number in self._batches
+
+    def add(self, phone_number: str, message_data: Dict[str, Any]):
+        """Adiciona uma nota ao lote do cliente (abrindo um se necessário) e reinicia a janela"""
+        batch = self._batches.get(phone_number)
+        if batch is None:
+            batch = self._batches[phone_number] = {"messages": [], "opened_at": time.monotonic(), "timer": None}
+        else:
+            batch["timer"].cancel()
+            self.notes_coalesced += 1
+
+        batch["messages"].append(message_data)
+
+        if len(batch["messages"]) >= self.max_batch:
+            self.flush(phone_number)
+            return
+
+        remaining = self.max_wait - (time.monotonic() - batch["opened_at"])
+        delay = max(0.0, min(self.window, remaining))
+        batch["timer"] = asyncio.get_running_loop().call_later(delay, self.flush, phone_number)
+
+    def flush(self, phone_number: str):
+        """Fecha o lote do cliente e o entrega ao callback"""
+        batch = self._batches.pop(phone_number, None)
+        if batch is None:
+            return
+
+        if batch["timer"] is not None:
+            batch["timer"].cancel()
+
+        self.batches_flushed += 1
+        if len(batch["messages"]) > 1:
+            logger.info(f"🧺 {len(batch['messages'])} notas de voz agrupadas para {phone_number}")
+
+        try:
+            self.on_flush(phone_number, batch["messages"])
+        except Exception as e:
+            logger.error(f"❌ Erro ao entregar lote de notas de voz de {phone_number}: {str(e)}")
+
+    def flush_all(self):
+        """Entrega imediatamente todos os lotes abertos (ex.: no encerramento)"""
+        for phone_number in list(self._batches):
+            self.flush(phone_number)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "window_seconds": self.window,
+            "max_wait_seconds": self.max_wait,
+            "max_batch": self.max_batch,
+            "open_batches": len(self._batches),
+            "batches_flushed": self.batches_flushed,
+            "notes_coalesced": self.notes_coalesced,
+        }
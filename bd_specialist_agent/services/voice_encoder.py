@@ -0,0 +1,107 @@
+# services/voice_encoder.py
+import hashlib
+import logging
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+import aiofiles
+
+from app.config import settings
+from services.audio_processor import AudioProcessor
+from utils.audio_buffer import iter_bytes
+from utils.cache import LRUCache
+from utils.exceptions import AudioProcessingError
+
+logger = logging.getLogger(__name__)
+
+OPUS_CONTENT_TYPE = "audio/ogg; codecs=opus"
+WAV_CONTENT_TYPE = "audio/wav"
+
+class VoiceEncoder:
+    """Codifica o áudio do TTS no formato enviado ao WhatsApp.
+
+    Com TTS_OUTPUT_FORMAT=opus o WAV do Piper vira uma nota de voz OGG/Opus
+    (TTS_OPUS_BITRATE_KBPS) antes do upload; com "wav" o áudio passa direto. Se o
+    FFmpeg faltar ou falhar, o WAV original é enviado: cada método retorna o áudio
+    junto com o content type que de fato vale para ele.
+    """
+
+    # Fixed replies are re-sent often: keep their encoded bytes around
+    ENCODED_CACHE_ENTRIES = 32
+
+    def __init__(self, output_format: Optional[str] = None, bitrate_kbps: Optional[int] = None):
+        self.output_format = (output_format or settings.TTS_OUTPUT_FORMAT).lower()
+        self.bitrate_kbps = bitrate_kbps or settings.TTS_OPUS_BITRATE_KBPS
+        self.sample_rate = settings.TTS_OPUS_SAMPLE_RATE
+        self._encoded = LRUCache(self.ENCODED_CACHE_ENTRIES)
+
+    @property
+    def enabled(self) -> bool:
+        return self.output_format == "opus"
+
+    @staticmethod
+    def extension(content_type: str) -> str:
+        return ".ogg" if content_type == OPUS_CONTENT_TYPE else ".wav"
+
+    def filename(self, stem: str, content_type: str) -> str:
+        return f"{stem}{self.extension(content_type)}"
+
+    def _fallback(self, error: AudioProcessingError):
+        logger.warning(f"⚠️ Codificação Opus indisponível, enviando WAV original: {str(error)}")
+
+    async def encode(self, audio: bytes) -> Tuple[bytes, str]:
+        """Codifica um áudio WAV em memória; retorna (áudio, content type), com o WAV original se o FFmpeg falhar"""
+        if not self.enabled:
+            return audio, WAV_CONTENT_TYPE
+
+        try:
+            encoded = await AudioProcessor.convert_audio_bytes(audio, "opus", self.sample_rate, self.bitrate_kbps)
+        except AudioProcessingError as e:
+            self._fallback(e)
+            return audio, WAV_CONTENT_TYPE
+        return encoded, OPUS_CONTENT_TYPE
+
+    async def encode_stream(self, audio_chunks: AsyncIterator[bytes]) -> Tuple[AsyncIterator[bytes], str]:
+        """Codifica um stream WAV; retorna os blocos a enviar e o content type deles.
+
+        Em WAV o stream passa direto; em Opus ele é lido inteiro e codificado de uma vez.
+        """
+        if not self.enabled:
+            return audio_chunks, WAV_CONTENT_TYPE
+
+        audio = b"".join([chunk async for chunk in audio_chunks])
+        encoded, content_type = await self.encode(audio)
+        return iter_bytes(encoded), content_type
+
+    async def encode_bytes(self, audio: bytes) -> Tuple[bytes, str]:
+        """Codifica um áudio WAV já em memória (resultado memorizado por conteúdo); retorna (áudio, content type)"""
+        if not self.enabled:
+            return audio, WAV_CONTENT_TYPE
+
+        key = hashlib.sha256(audio).hexdigest()
+        encoded = self._encoded.get(key)
+        if encoded is None:
+            encoded, content_type = await self.encode(audio)
+            if content_type != OPUS_CONTENT_TYPE:
+                return encoded, content_type
+            self._encoded.set(key, encoded)
+        return encoded, OPUS_CONTENT_TYPE
+
+    async def encode_file(self, audio_path: str) -> Tuple[str, str]:
+        """Codifica um arquivo WAV e grava a nota de voz ao lado dele; retorna (caminho a enviar, content type)"""
+        if not self.enabled:
+            return audio_path, WAV_CONTENT_TYPE
+
+        async with aiofiles.open(audio_path, "rb") as f:
+            audio = await f.read()
+
+        encoded, content_type = await self.encode(audio)
+        if content_type != OPUS_CONTENT_TYPE:
+            return audio_path, content_type
+
+        output_path = str(Path(audio_path).with_suffix(self.extension(OPUS_CONTENT_TYPE)))
+        async with aiofiles.open(output_path, "wb") as f:
+            await f.write(encoded)
+
+        logger.info(f"🗜️ Áudio codificado em Opus: {len(audio)} -> {len(encoded)} bytes")
+        return output_path, OPUS_CONTENT_TYPE
@@ -0,0 +1,45 @@
+# tests/test_speech_text.py
+import pytest
+
+from utils.speech_text import normalize_for_speech, number_to_words
+
+@pytest.mark.parametrize("number, spoken", [
+    (0, "zero"),
+    (100, "cem"),
+    (101, "cento e um"),
+    (1000, "mil"),
+    (1200, "mil e duzentos"),
+    (1250, "mil duzentos e cinquenta"),
+    (2026, "dois mil e vinte e seis"),
+    (2500000, "dois milhões e quinhentos mil"),
+    (1000000000, "um bilhão"),
+    (-5, "menos cinco"),
+])
+def test_number_to_words(number, spoken):
+    assert number_to_words(number) == spoken
+
+@pytest.mark.parametrize("text, spoken", [
+    # Counts are quantities, however many digits
+    ("Total de 2500000 registros", "Total de dois milhões e quinhentos mil registros"),
+    ("Foram 15000 vendas", "Foram quinze mil vendas"),
+    ("São 1.234.567 itens", "São um milhão duzentos e trinta e quatro mil quinhentos e sessenta e sete itens"),
+    ("Valor 3,05", "Valor três vírgula zero cinco"),
+    # Year ranges
+    ("Vendas de 2023-2024", "Vendas de dois mil e vinte e três a dois mil e vinte e quatro"),
+    # Dates
+    ("Pedido de 18/10/2026", "Pedido de dezoito de outubro de dois mil e vinte e seis"),
+    ("Desde 2026-10-01", "Desde primeiro de outubro de dois mil e vinte e seis"),
+    ("Em 99/99/2026", "Em noventa e nove/noventa e nove/dois mil e vinte e seis"),
+    # Money
+    ("Total R$ 1.500,50", "Total mil e quinhentos reais e cinquenta centavos"),
+    ("Custa R$ 1", "Custa um real"),
+    ("Receita de R$ 2.000.000", "Receita de dois milhões de reais"),
+    ("Troco R$ 10,05", "Troco dez reais e cinco centavos"),
+    # Codes are read digit by digit
+    ("pedido 4521", "pedido quatro cinco dois um"),
+    ("código 0800", "código zero oito zero zero"),
+    ("Ligue (11) 98765-4321", "Ligue um um, nove oito sete seis cinco, quatro três dois um"),
+    ("CPF 123.456.789-09", "CPF um dois três, quatro cinco seis, sete oito nove, zero nove"),
+])
+def test_normalize_for_speech(text, spoken):
+    assert normalize_for_speech(text) == spoken
@@ -0,0 +1,180 @@
+# utils/audio_buffer.py
+import base64
+import binascii
+import hashlib
+import io
+import os
+import wave
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+def new_audio_buffer(max_memory_bytes: int) -> SpooledTemporaryFile:
+    """Cria um buffer binário em memória que passa para disco acima de `max_memory_bytes`"""
+    return SpooledTemporaryFile(max_size=max_memory_bytes, mode="w+b")
+
+def decode_base64_buffer(data: str, max_memory_bytes: int, max_bytes: int) -> SpooledTemporaryFile:
+    """Decodifica mídia em base64 (aceita prefixo data URI) para um buffer de áudio.
+
+    Levanta ValueError se o conteúdo não for base64 válido ou passar de `max_bytes`.
+    """
+    if data.startswith("data:"):
+        data = data.split(",", 1)[-1]
+    data = "".join(data.split())
+
+    if len(data) * 3 // 4 > max_bytes:
+        raise ValueError(f"Mídia inline excede {max_bytes} bytes")
+
+    try:
+        audio = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Base64 inválido: {str(e)}")
+    if not audio:
+        raise ValueError("Mídia inline vazia")
+
+    buffer = new_audio_buffer(max_memory_bytes)
+    buffer.write(audio)
+    buffer.seek(0)
+    return buffer
+
+def buffer_size(buffer: BinaryIO) -> int:
+    """Retorna o tamanho do buffer em bytes sem alterar a posição atual"""
+    position = buffer.tell()
+    size = buffer.seek(0, os.SEEK_END)
+    buffer.seek(position)
+    return size
+
+def hash_buffer(buffer: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Calcula o SHA-256 do conteúdo do buffer e volta para o início"""
+    digest = hashlib.sha256()
+    buffer.seek(0)
+    for chunk in iter(lambda: buffer.read(chunk_size), b""):
+        digest.update(chunk)
+    buffer.seek(0)
+    return digest.hexdigest()
+
+def encode_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Empacota PCM 16 bits mono em um arquivo WAV em memória"""
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return output.getvalue()
+
+def concat_wav(segments: List[bytes], pause_ms: int = 0) -> bytes:
+    """Junta WAVs de mesmo formato em um único arquivo (cabeçalho correto), com uma pausa entre eles"""
+    frames = []
+    params = None
+
+    for segment in segments:
+        with wave.open(io.BytesIO(segment), "rb") as wav_file:
+            segment_params = wav_file.getparams()[:3]
+            if params is None:
+                params = segment_params
+            elif segment_params != params:
+                raise ValueError(f"Segmentos WAV com formatos diferentes: {params} != {segment_params}")
+            frames.append(wav_file.readframes(wav_file.getnframes()))
+
+    if params is None:
+        raise ValueError("Nenhum segmento WAV para concatenar")
+
+    channels, sample_width, sample_rate = params
+    silence = b"\x00" * (sample_rate * pause_ms // 1000 * channels * sample_width)
+
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(silence.join(frames))
+    return output.getvalue()
+
+async def iter_bytes(data: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Itera bytes já em memória em blocos, com a mesma interface dos streams de áudio"""
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+async def iter_buffer(buffer: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Itera o conteúdo do buffer desde o início, em blocos (usado como corpo de upload em streaming)"""
+    buffer.seek(0)
+    while True:
+        chunk = buffer.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+class ReplayableStream:
+    """Repassa um stream de bytes guardando os blocos já lidos, para que um envio possa recomeçar do início.
+
+    Os blocos ficam num buffer que passa para disco acima de `max_memory_bytes`; passados
+    `max_bytes` o buffer é descartado e o stream deixa de ser reenviável. Só um consumidor
+    por vez; se o stream de origem falhar, o erro é repetido em vez de produzir um áudio
+    truncado.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], max_bytes: int, max_memory_bytes: int):
+        self._chunks = chunks
+        self.max_bytes = max_bytes
+        self._buffer: Optional[SpooledTemporaryFile] = new_audio_buffer(max_memory_bytes)
+        self._size = 0
+        self._started = False
+        self._exhausted = False
+        self.error: Optional[BaseException] = None
+
+    @property
+    def replayable(self) -> bool:
+        """False depois que uma leitura começou e o buffer passou de `max_bytes`"""
+        return not self._started or self._buffer is not None
+
+    async def _pull(self) -> Optional[bytes]:
+        if self._exhausted:
+            return None
+        if self.error is not None:
+            raise self.error
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._exhausted = True
+            return None
+        except Exception as e:
+            self.error = e
+            raise
+
+        if self._buffer is not None:
+            # The first chunk is always kept: prime() reads it before anyone consumes it
+            if self._size and self._size + len(chunk) > self.max_bytes:
+                self.close()
+            else:
+                self._buffer.seek(self._size)
+                self._buffer.write(chunk)
+                self._size += len(chunk)
+        return chunk
+
+    async def prime(self) -> bool:
+        """Lê o primeiro bloco (falhas da origem aparecem antes do envio); False se o stream for vazio"""
+        return self._size > 0 or await self._pull() is not None
+
+    async def replay(self) -> AsyncIterator[bytes]:
+        if not self.replayable:
+            raise RuntimeError("Stream já consumido além do limite de reenvio")
+        self._started = True
+
+        offset = 0
+        while True:
+            if self._buffer is not None and offset < self._size:
+                self._buffer.seek(offset)
+                chunk = self._buffer.read(min(DEFAULT_CHUNK_SIZE, self._size - offset))
+            else:
+                chunk = await self._pull()
+                if chunk is None:
+                    break
+            offset += len(chunk)
+            yield chunk
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
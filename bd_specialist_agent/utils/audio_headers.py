@@ -0,0 +1,206 @@
+# utils/audio_headers.py
+"""Identificação do formato e leitura da duração de áudio direto dos cabeçalhos, sem FFmpeg"""
+import os
+import struct
+from typing import BinaryIO, Optional
+
+# Bytes read from the start/end of the file; enough for the headers we parse
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 64 * 1024
+
+# Enough leading bytes to tell every supported container apart
+SNIFF_BYTES = 16
+
+AUDIO_CONTENT_TYPES = {
+    "ogg": "audio/ogg",
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+    "m4a": "audio/mp4",
+    "aac": "audio/aac",
+}
+
+OGG_UNSET_GRANULE = 0xFFFFFFFFFFFFFFFF
+
+# MPEG audio tables indexed by [version][layer] -> kbps per bitrate index
+_MPEG1_BITRATES = {
+    1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+}
+_MPEG2_BITRATES = {
+    1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MPEG_SAMPLE_RATES = {
+    "1": (44100, 48000, 32000),
+    "2": (22050, 24000, 16000),
+    "2.5": (11025, 12000, 8000),
+}
+_MPEG_VERSIONS = {3: "1", 2: "2", 0: "2.5"}
+_MPEG_LAYERS = {3: 1, 2: 2, 1: 3}
+
+def detect_container(header: bytes) -> Optional[str]:
+    """Identifica o container pelos primeiros bytes ("ogg", "wav", "mp3", "m4a", "aac") ou None"""
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    # ADTS sync word with layer bits 00 (MPEG audio frames never use layer 00)
+    if len(header) >= 2 and header[0] == 0xFF and header[1] & 0xF6 == 0xF0:
+        return "aac"
+    if header[:3] == b"ID3" or _parse_mpeg_frame(header, 0) is not None:
+        return "mp3"
+    return None
+
+def sniff_format(source: BinaryIO) -> Optional[str]:
+    """Identifica o formato lendo só os primeiros bytes do arquivo/buffer (posição preservada)"""
+    position = source.tell()
+    try:
+        source.seek(0)
+        return detect_container(source.read(SNIFF_BYTES))
+    finally:
+        source.seek(position)
+
+def read_duration(source: BinaryIO) -> Optional[float]:
+    """Retorna a duração (segundos) lida dos cabeçalhos, ou None se o formato não for reconhecido"""
+    position = source.tell()
+    try:
+        size = source.seek(0, os.SEEK_END)
+        source.seek(0)
+        head = source.read(HEAD_BYTES)
+
+        container = detect_container(head)
+        if container == "wav":
+            return _wav_duration(head, size)
+        if container == "ogg":
+            source.seek(max(0, size - TAIL_BYTES))
+            return _ogg_duration(head, source.read(TAIL_BYTES))
+        if container == "mp3":
+            return _mp3_duration(head, size)
+        return None
+
+    except (struct.error, ValueError, ZeroDivisionError):
+        return None
+    finally:
+        source.seek(position)
+
+def read_file_duration(file_path: str) -> Optional[float]:
+    with open(file_path, "rb") as f:
+        return read_duration(f)
+
+def _wav_duration(head: bytes, size: int) -> Optional[float]:
+    byte_rate = None
+    offset = 12
+
+    # Walk the RIFF chunks until "data"; "fmt " gives the byte rate
+    while offset + 8 <= len(head):
+        chunk_id = head[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", head, offset + 4)[0]
+
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack_from("<I", head, offset + 16)[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streamed WAVs (e.g. FFmpeg to a pipe) leave the size unset; use the rest of the file
+            available = size - (offset + 8)
+            data_size = available if chunk_size in (0, 0xFFFFFFFF) else min(chunk_size, available)
+            return data_size / byte_rate
+
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+    return None
+
+def _ogg_duration(head: bytes, tail: bytes) -> Optional[float]:
+    # First packet tells the codec: Opus always runs its granule clock at 48 kHz
+    packet = head[27 + head[26]:]
+    if packet.startswith(b"OpusHead"):
+        sample_rate = 48000
+        pre_skip = struct.unpack_from("<H", packet, 10)[0]
+    elif packet.startswith(b"\x01vorbis"):
+        sample_rate = struct.unpack_from("<I", packet, 12)[0]
+        pre_skip = 0
+    else:
+        return None
+
+    # Granule position of the last page = total samples decoded
+    page = tail.rfind(b"OggS")
+    while page != -1:
+        granule = struct.unpack_from("<Q", tail, page + 6)[0]
+        if granule != OGG_UNSET_GRANULE:
+            return max(0, granule - pre_skip) / sample_rate
+        page = tail.rfind(b"OggS", 0, page)
+
+    return None
+
+def _parse_mpeg_frame(data: bytes, offset: int) -> Optional[dict]:
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    version = _MPEG_VERSIONS.get((b1 >> 3) & 3)
+    layer = _MPEG_LAYERS.get((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    bitrates = _MPEG1_BITRATES if version == "1" else _MPEG2_BITRATES
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 2 or version == "1":
+        samples_per_frame = 1152
+    else:
+        samples_per_frame = 576
+
+    return {
+        "version": version,
+        "layer": layer,
+        "bitrate": bitrates[layer][bitrate_index] * 1000,
+        "sample_rate": _MPEG_SAMPLE_RATES[version][sample_rate_index],
+        "samples_per_frame": samples_per_frame,
+        "mono": (b3 >> 6) == 3,
+    }
+
+def _mp3_duration(head: bytes, size: int) -> Optional[float]:
+    offset = 0
+
+    # Skip the ID3v2 tag (syncsafe size)
+    if head[:3] == b"ID3":
+        tag_size = (head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14 | (head[8] & 0x7F) << 7 | (head[9] & 0x7F)
+        offset = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+        if offset >= len(head):
+            return None
+
+    # First valid frame header
+    frame = None
+    while offset < len(head) - 4:
+        frame = _parse_mpeg_frame(head, offset)
+        if frame is not None:
+            break
+        offset += 1
+    if frame is None:
+        return None
+
+    # VBR files carry the frame count in a Xing/Info or VBRI header inside the first frame
+    if frame["version"] == "1":
+        side_info = 17 if frame["mono"] else 32
+    else:
+        side_info = 9 if frame["mono"] else 17
+    xing = offset + 4 + side_info
+    if head[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", head, xing + 4)[0]
+        if flags & 1:
+            frames = struct.unpack_from(">I", head, xing + 8)[0]
+            return frames * frame["samples_per_frame"] / frame["sample_rate"]
+
+    vbri = offset + 4 + 32
+    if head[vbri:vbri + 4] == b"VBRI":
+        frames = struct.unpack_from(">I", head, vbri + 14)[0]
+        return frames * frame["samples_per_frame"] / frame["sample_rate"]
+
+    # Constant bitrate: audio bytes / byte rate
+    return (size - offset) * 8 / frame["bitrate"]
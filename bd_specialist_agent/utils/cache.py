@@ -0,0 +1,159 @@
+# utils/cache.py
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class LRUCache:
+    """Cache em memória limitado por número de entradas (LRU), com TTL opcional"""
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor (renovando sua posição LRU) ou `default`; contabiliza hit/miss"""
+        entry = self._data.get(key, _MISSING)
+        now = time.time()
+
+        if entry is _MISSING or self._is_expired(entry[1], now):
+            if entry is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None):
+        """Armazena um valor, descartando as entradas menos usadas se exceder o limite"""
+        self._data[key] = (value, stored_at or time.time())
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        self._data.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+class DiskCache:
+    """Cache em disco (um arquivo por chave) limitado pelo tamanho total, com descarte LRU.
+
+    As chaves devem ser seguras como nome de arquivo (ex.: hashes hexadecimais).
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Index rebuilt from the files left by previous runs, oldest access first
+        files = sorted(
+            (path for path in self.directory.iterdir() if path.is_file() and not path.name.endswith(".tmp")),
+            key=lambda path: path.stat().st_mtime
+        )
+        self._sizes: "OrderedDict[str, int]" = OrderedDict((path.name, path.stat().st_size) for path in files)
+        self.total_bytes = sum(self._sizes.values())
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def get(self, key: str) -> Optional[bytes]:
+        if key not in self._sizes:
+            self.misses += 1
+            return None
+
+        path = self.directory / key
+        try:
+            value = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self._forget(key)
+            self.misses += 1
+            return None
+
+        self._sizes.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+
+        path = self.directory / key
+        tmp_path = path.with_name(f"{key}.tmp")
+        try:
+            tmp_path.write_bytes(value)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        self._forget(key)
+        self._sizes[key] = len(value)
+        self.total_bytes += len(value)
+        self._evict()
+
+    def _forget(self, key: str):
+        size = self._sizes.pop(key, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                (self.directory / key).unlink()
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "directory": str(self.directory),
+            "entries": len(self._sizes),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -1,5 +1,6 @@
 # utils/exceptions.py
 """Exceções customizadas para o sistema"""
+from typing import Optional
 
 class BaseAgentError(Exception):
     """Exceção base para o sistema"""
@@ -13,18 +14,45 @@ class AgentError(BaseAgentError):
     """Erro no processamento do agente"""
     pass
 
-class STTError(BaseAgentError):
+class UpstreamError(BaseAgentError):
+    """Erro em uma chamada a um serviço externo (STT, TTS, Evolution)"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: Optional[bool] = None):
+        super().__init__(message)
+        self.status = status
+        # Connection errors, throttling (429) and 5xx are worth retrying
+        self.retryable = retryable if retryable is not None else (status is None or status == 429 or status >= 500)
+
+class CircuitOpenError(UpstreamError):
+    """Circuit breaker do serviço aberto: chamada recusada sem tentar"""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=False)
+
+class STTError(UpstreamError):
     """Erro no serviço de Speech-to-Text"""
     pass
 
-class TTSError(BaseAgentError):
+class TTSError(UpstreamError):
     """Erro no serviço de Text-to-Speech"""
     pass
 
-class EvolutionAPIError(BaseAgentError):
+class EvolutionAPIError(UpstreamError):
     """Erro na Evolution API"""
     pass
 
 class AudioProcessingError(BaseAgentError):
     """Erro no processamento de áudio"""
     pass
+
+class SilentAudioError(AudioProcessingError):
+    """Áudio sem fala detectável"""
+    pass
+
+class InvalidAudioError(AudioProcessingError):
+    """Conteúdo não é um áudio em formato suportado"""
+    pass
+
+class JobQueueFullError(BaseAgentError):
+    """Fila de jobs cheia ou indisponível"""
+    pass
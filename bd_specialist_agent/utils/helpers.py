@@ -13,6 +13,25 @@ def extract_phone_number(remote_jid: str) -> str:
         phone = phone[2:]
     return phone
 
+def extract_message_id(webhook_data: Dict[str, Any]) -> Optional[str]:
+    """Extrai o id da mensagem do WhatsApp (key.id) do webhook"""
+    key = webhook_data.get("data", {}).get("key") or webhook_data.get("key") or {}
+    return key.get("id")
+
+def is_from_me(webhook_data: Dict[str, Any]) -> bool:
+    """Indica se a mensagem foi enviada pela própria instância (operador ou o bot)"""
+    key = webhook_data.get("data", {}).get("key") or webhook_data.get("key") or {}
+    return bool(key.get("fromMe"))
+
+# Groups, contacts' status posts and channels: never answered as if they were a customer
+NON_INDIVIDUAL_JID_SUFFIXES = ("@g.us", "@broadcast", "@newsletter")
+
+def is_individual_chat(webhook_data: Dict[str, Any]) -> bool:
+    """Indica se a mensagem veio de uma conversa individual (não grupo, status ou canal)"""
+    key = webhook_data.get("data", {}).get("key") or webhook_data.get("key") or {}
+    remote_jid = key.get("remoteJid") or ""
+    return bool(remote_jid) and not remote_jid.endswith(NON_INDIVIDUAL_JID_SUFFIXES)
+
 def is_audio_message(webhook_data: Dict[str, Any]) -> bool:
     """Verifica se a mensagem é de áudio"""
     try:
@@ -22,6 +41,23 @@ def is_audio_message(webhook_data: Dict[str, Any]) -> bool:
     except:
         return False
 
+def extract_message_text(webhook_data: Dict[str, Any]) -> Optional[str]:
+    """Extrai o texto digitado de uma mensagem de texto (None se não for texto)"""
+    message = webhook_data.get("data", {}).get("message") or {}
+    text = message.get("conversation") or (message.get("extendedTextMessage") or {}).get("text")
+    if isinstance(text, str) and text.strip():
+        return text.strip()
+    return None
+
+def extract_inline_media(webhook_data: Dict[str, Any]) -> Optional[str]:
+    """Extrai a mídia enviada em base64 no próprio webhook (Evolution com webhook base64 ativo)"""
+    data = webhook_data.get("data") or {}
+    for container in (data.get("message") or {}, data, webhook_data):
+        media = container.get("base64")
+        if isinstance(media, str) and media.strip():
+            return media
+    return None
+
 def format_file_size(bytes_size: int) -> str:
     """Formata bytes em KB, MB, GB"""
     if bytes_size < 1024:
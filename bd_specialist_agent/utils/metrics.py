@@ -0,0 +1,108 @@
+# utils/metrics.py
+"""Métricas Prometheus do pipeline, dos serviços externos e dos bancos de dados"""
+import functools
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Histogram
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "bd_agent_pipeline_stage_seconds",
+    "Duração de cada etapa do pipeline de mensagens",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+PIPELINE_STAGE_ERRORS = Counter(
+    "bd_agent_pipeline_stage_errors_total",
+    "Falhas em cada etapa do pipeline de mensagens",
+    ["stage"],
+)
+
+SERVICE_CALL_SECONDS = Histogram(
+    "bd_agent_service_call_seconds",
+    "Duração das chamadas aos serviços externos (Evolution, STT, TTS)",
+    ["service", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+SERVICE_CALL_ERRORS = Counter(
+    "bd_agent_service_call_errors_total",
+    "Falhas nas chamadas aos serviços externos",
+    ["service", "operation"],
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "bd_agent_db_query_seconds",
+    "Duração das queries executadas pelo DatabaseManager",
+    ["database"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter(
+    "bd_agent_db_query_errors_total",
+    "Falhas nas queries executadas pelo DatabaseManager",
+    ["database"],
+)
+
+EVOLUTION_OUTBOX_MESSAGES = Counter(
+    "bd_agent_evolution_outbox_messages_total",
+    "Envios da outbox da Evolution API por resultado (sent, retried, dropped)",
+    ["instance", "result"],
+)
+
+TIME_TO_FIRST_AUDIO_SECONDS = Histogram(
+    "bd_agent_time_to_first_audio_seconds",
+    "Tempo do início do processamento até a entrega do primeiro áudio de resposta",
+    ["mode"],
+    buckets=LATENCY_BUCKETS,
+)
+
+VOICE_NOTE_SOURCES = Counter(
+    "bd_agent_voice_note_source_total",
+    "Origem do áudio de cada nota de voz processada (inline no webhook ou download pelo mediaUrl)",
+    ["source"],
+)
+
+VAD_TRIMMED_SECONDS = Histogram(
+    "bd_agent_vad_trimmed_seconds",
+    "Segundos de silêncio removidos de cada nota de voz antes do STT",
+    buckets=(0, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 60),
+)
+VAD_SILENT_CLIPS = Counter(
+    "bd_agent_vad_silent_clips_total",
+    "Notas de voz recusadas por não conterem fala",
+)
+
+@contextmanager
+def _timed(histogram: Histogram, errors: Counter, **labels: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        errors.labels(**labels).inc()
+        raise
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+def track_stage(stage: str):
+    """Mede uma etapa do pipeline (ex.: download, stt, agent, tts, send)"""
+    return _timed(PIPELINE_STAGE_SECONDS, PIPELINE_STAGE_ERRORS, stage=stage)
+
+def track_service_call(service: str, operation: str):
+    """Mede uma chamada a um serviço externo"""
+    return _timed(SERVICE_CALL_SECONDS, SERVICE_CALL_ERRORS, service=service, operation=operation)
+
+def track_db_query(database: str):
+    """Mede uma query em um banco de dados"""
+    return _timed(DB_QUERY_SECONDS, DB_QUERY_ERRORS, database=database)
+
+def observe_service_call(service: str, operation: str):
+    """Decorator de `track_service_call` para métodos assíncronos dos serviços"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_service_call(service, operation):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
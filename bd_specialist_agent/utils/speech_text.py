@@ -0,0 +1,268 @@
+# utils/speech_text.py
+"""Preparação de texto para o TTS: normalização em pt-BR (números, SQL) e segmentação em frases"""
+import re
+from typing import AsyncIterator, List
+
+_UNITS = (
+    "zero", "um", "dois", "três", "quatro", "cinco", "seis", "sete", "oito", "nove",
+    "dez", "onze", "doze", "treze", "quatorze", "quinze", "dezesseis", "dezessete", "dezoito", "dezenove",
+)
+_TENS = ("", "", "vinte", "trinta", "quarenta", "cinquenta", "sessenta", "setenta", "oitenta", "noventa")
+_HUNDREDS = (
+    "", "cento", "duzentos", "trezentos", "quatrocentos",
+    "quinhentos", "seiscentos", "setecentos", "oitocentos", "novecentos",
+)
+_SCALES = (
+    (10 ** 12, "trilhão", "trilhões"),
+    (10 ** 9, "bilhão", "bilhões"),
+    (10 ** 6, "milhão", "milhões"),
+    (10 ** 3, "mil", "mil"),
+)
+
+# Digit runs longer than this are no quantity and are read digit by digit; shorter ones are
+# read as quantities unless a cue marks them as codes (leading zero, "ID", "código", "pedido", "#")
+_MAX_SPOKEN_DIGITS = 15
+
+_MONTHS = (
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+)
+
+# Spoken forms for operators and tokens common in database answers
+_SQL_OPERATORS = (
+    (">=", " maior ou igual a "),
+    ("<=", " menor ou igual a "),
+    ("<>", " diferente de "),
+    ("!=", " diferente de "),
+    ("=", " igual a "),
+    (">", " maior que "),
+    ("<", " menor que "),
+    ("%", " por cento"),
+    ("*", " asterisco "),
+)
+_SPOKEN_TOKENS = {
+    "SQL": "ésse quê éle",
+    "ID": "ái dí",
+    "IDs": "ái dís",
+    "DB": "dê bê",
+    "CPU": "cê pê u",
+    "NULL": "nulo",
+}
+_SQL_KEYWORDS = (
+    "SELECT", "FROM", "WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "OUTER", "GROUP", "ORDER", "BY",
+    "HAVING", "LIMIT", "INSERT", "UPDATE", "DELETE", "CREATE", "ALTER", "DROP", "TRUNCATE", "TABLE",
+    "INDEX", "VIEW", "COUNT", "SUM", "AVG", "MIN", "MAX", "DISTINCT", "AND", "OR", "NOT", "IN",
+    "LIKE", "BETWEEN", "AS", "ON", "UNION", "VALUES", "SET", "INTO", "SHOW", "DESCRIBE", "EXPLAIN",
+)
+
+_DATE = re.compile(r"(?<![\d/])(\d{1,2})/(\d{1,2})/(\d{4}|\d{2})(?![\d/])")
+_ISO_DATE = re.compile(r"(?<![\d-])(\d{4})-(\d{2})-(\d{2})(?![\d-])")
+_YEAR_RANGE = re.compile(r"(?<![\d-])((?:19|20)\d{2})\s*[-–]\s*((?:19|20)\d{2})(?![\d-])")
+# CPF, CNPJ and phone numbers with area code ("(11) 98765-4321") are read group by group, digit by digit
+_DIGIT_CODE = re.compile(
+    r"(?<![\d.])\d{2,3}\.\d{3}\.\d{3}(?:/\d{4})?-\d{2}(?!\d)|\(\d{2}\)\s*\d{4,5}-\d{4}(?!\d)"
+)
+_CODE_CUE = re.compile(r"((?<!\w)(?:IDs?|ids?|[Cc]ódigo|[Pp]edido)\s*:?\s*#?\s*|#\s*)(\d+)(?!\d|[.,]\d)")
+_THOUSANDS_NUMBER = re.compile(r"\d{1,3}(?:\.\d{3})+(?:,\d+)?(?!\d)")
+_DECIMAL_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+_CURRENCY = re.compile(r"R\$\s*(\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:,\d{1,2})?)")
+_SQL_KEYWORD = re.compile(r"\b(" + "|".join(_SQL_KEYWORDS) + r")\b")
+_SPOKEN_TOKEN = re.compile(
+    r"(?<!\w)(" + "|".join(re.escape(token) for token in sorted(_SPOKEN_TOKENS, key=len, reverse=True)) + r")(?!\w)"
+)
+_MARKDOWN = re.compile(r"```\w*|[`#]|\*\*|__|^\s*[-*•]\s+", re.MULTILINE)
+_SENTENCE_END = re.compile(r"(?<=[.!?;:…])\s+|\n+")
+_CLAUSE_END = re.compile(r"(?<=[,—–])\s+|\s+(?=\()")
+
+def _below_thousand(number: int) -> str:
+    if number == 100:
+        return "cem"
+
+    parts = []
+    hundreds, rest = divmod(number, 100)
+    if hundreds:
+        parts.append(_HUNDREDS[hundreds])
+    if rest >= 20:
+        tens, units = divmod(rest, 10)
+        parts.append(_TENS[tens] + (f" e {_UNITS[units]}" if units else ""))
+    elif rest:
+        parts.append(_UNITS[rest])
+    return " e ".join(parts)
+
+def number_to_words(number: int) -> str:
+    """Escreve um inteiro por extenso em pt-BR (ex.: 1250 -> "mil duzentos e cinquenta")"""
+    if number < 0:
+        return f"menos {number_to_words(-number)}"
+    if number < 1000:
+        return _below_thousand(number) if number else _UNITS[0]
+
+    groups = []
+    rest = number
+    for scale, singular, plural in _SCALES:
+        count, rest = divmod(rest, scale)
+        if not count:
+            continue
+        if scale == 1000 and count == 1:
+            groups.append((count, "mil"))
+        else:
+            groups.append((count, f"{number_to_words(count)} {singular if count == 1 else plural}"))
+    if rest:
+        groups.append((rest, _below_thousand(rest)))
+
+    if len(groups) == 1:
+        return groups[0][1]
+
+    # "mil e duzentos", "mil e cinco", "dois milhões e quinhentos mil", but "mil duzentos e cinquenta"
+    last_count = groups[-1][0]
+    joiner = " e " if last_count < 100 or last_count % 100 == 0 else " "
+    return " ".join(phrase for _, phrase in groups[:-1]) + joiner + groups[-1][1]
+
+def _spell_digits(digits: str) -> str:
+    return " ".join(_UNITS[int(digit)] for digit in digits)
+
+def _digits_to_words(digits: str) -> str:
+    # "007", "0800": a leading zero means a code, not a quantity
+    if len(digits) > _MAX_SPOKEN_DIGITS or (len(digits) > 1 and digits.startswith("0")):
+        return _spell_digits(digits)
+    return number_to_words(int(digits))
+
+def _spoken_date(day: str, month: str, year: str) -> str:
+    """Lê uma data ("18/10/2026" -> "dezoito de outubro de dois mil e vinte e seis")"""
+    day_number, month_number = int(day), int(month)
+    spoken = "primeiro" if day_number == 1 else number_to_words(day_number)
+    return f"{spoken} de {_MONTHS[month_number - 1]} de {number_to_words(int(year))}"
+
+def _date_match(day: str, month: str, year: str, original: str) -> str:
+    if not (1 <= int(day) <= 31 and 1 <= int(month) <= 12):
+        return original
+    return _spoken_date(day, month, year)
+
+def _spoken_code(match: re.Match) -> str:
+    return ", ".join(_spell_digits(group) for group in re.findall(r"\d+", match.group(0)))
+
+def _spoken_number(text: str) -> str:
+    """Lê um número em formato pt-BR ("1.234,5") ou com ponto decimal ("3.5")"""
+    if "," in text:
+        integer, fraction = text.replace(".", "").split(",", 1)
+    elif _THOUSANDS_NUMBER.fullmatch(text):
+        integer, fraction = text.replace(".", ""), ""
+    elif "." in text:
+        integer, fraction = text.split(".", 1)
+    else:
+        integer, fraction = text, ""
+
+    # "1.234.567" is a quantity however many digits it has
+    if _THOUSANDS_NUMBER.match(text):
+        spoken = number_to_words(int(integer))
+    else:
+        spoken = _digits_to_words(integer or "0")
+    if fraction:
+        # Leading zeros are spoken ("3,05" -> "três vírgula zero cinco")
+        zeros = len(fraction) - len(fraction.lstrip("0"))
+        spoken += " vírgula " + " ".join([_UNITS[0]] * zeros + ([_digits_to_words(fraction.lstrip("0"))] if fraction.strip("0") else []))
+    return spoken
+
+def _spoken_currency(match: re.Match) -> str:
+    amount = match.group(1)
+    if "," in amount:
+        reais, centavos = amount.replace(".", "").split(",", 1)
+        centavos = (centavos + "0")[:2]
+    else:
+        reais, centavos = amount.replace(".", ""), "00"
+
+    spoken = number_to_words(int(reais or 0))
+    # "dois milhões de reais"
+    if spoken.endswith(("ão", "ões")):
+        spoken += " de"
+    spoken += " real" if int(reais or 0) == 1 else " reais"
+    if int(centavos):
+        spoken += f" e {number_to_words(int(centavos))} {'centavo' if int(centavos) == 1 else 'centavos'}"
+    return spoken
+
+def normalize_for_speech(text: str) -> str:
+    """Reescreve o texto como deve ser falado: números por extenso, SQL e símbolos legíveis"""
+    text = _MARKDOWN.sub("", text)
+    text = _CURRENCY.sub(_spoken_currency, text)
+
+    # Dates, documents and cued codes before the generic number rules (and before "ID" is spelled out)
+    text = _DATE.sub(lambda match: _date_match(*match.groups(), match.group(0)), text)
+    text = _ISO_DATE.sub(lambda match: _date_match(match.group(3), match.group(2), match.group(1), match.group(0)), text)
+    text = _YEAR_RANGE.sub(lambda match: f"{number_to_words(int(match.group(1)))} a {number_to_words(int(match.group(2)))}", text)
+    text = _DIGIT_CODE.sub(_spoken_code, text)
+    text = _CODE_CUE.sub(lambda match: match.group(1) + _spell_digits(match.group(2)), text)
+
+    # Identifiers like total_vendas read as separate words
+    text = re.sub(r"(?<=\w)_(?=\w)", " ", text)
+
+    text = _SQL_KEYWORD.sub(lambda match: match.group(1).lower(), text)
+    text = _SPOKEN_TOKEN.sub(lambda match: _SPOKEN_TOKENS[match.group(1)], text)
+    for operator, spoken in _SQL_OPERATORS:
+        text = text.replace(operator, spoken)
+
+    text = _THOUSANDS_NUMBER.sub(lambda match: _spoken_number(match.group(0)), text)
+    text = _DECIMAL_NUMBER.sub(lambda match: _spoken_number(match.group(0)), text)
+
+    return re.sub(r"[ \t]+", " ", text).strip()
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Quebra uma frase longa em orações e, em último caso, entre palavras"""
+    pieces = []
+    for clause in _CLAUSE_END.split(sentence):
+        while len(clause) > max_chars:
+            cut = clause.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        if clause:
+            pieces.append(clause)
+
+    # Re-join clauses that still fit together
+    segments = []
+    for piece in pieces:
+        if segments and len(segments[-1]) + 1 + len(piece) <= max_chars:
+            segments[-1] = f"{segments[-1]} {piece}"
+        else:
+            segments.append(piece)
+    return segments
+
+def split_sentences(text: str, max_chars: int, min_chars: int = 0) -> List[str]:
+    """Divide o texto em segmentos de frase com até `max_chars`, juntando frases curtas (< `min_chars`)"""
+    segments: List[str] = []
+
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+
+        for piece in (_split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence]):
+            if segments and len(segments[-1]) < min_chars and len(segments[-1]) + 1 + len(piece) <= max_chars:
+                segments[-1] = f"{segments[-1]} {piece}"
+            else:
+                segments.append(piece)
+
+    return segments
+
+async def iter_sentences(text_chunks: AsyncIterator[str], min_chars: int = 0) -> AsyncIterator[str]:
+    """Agrupa um texto que chega em pedaços (ex.: tokens do LLM) e emite cada frase assim que ela termina.
+
+    Frases menores que `min_chars` esperam a seguinte para não virarem áudios curtos demais,
+    exceto a primeira, que sai logo para antecipar o primeiro áudio.
+    """
+    pending = ""
+    emitted = False
+
+    async for chunk in text_chunks:
+        pending += chunk
+
+        # Each sentence boundary closes a sentence; short ones stay to join the next
+        start = 0
+        for boundary in _SENTENCE_END.finditer(pending):
+            complete = pending[start:boundary.start()].strip()
+            if complete and (not emitted or len(complete) >= min_chars):
+                yield complete
+                start = boundary.end()
+                emitted = True
+        pending = pending[start:]
+
+    if pending.strip():
+        yield pending.strip()